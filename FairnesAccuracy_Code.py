@@ -4,19 +4,28 @@
 # Import NumPy and Pandas
 import pandas as pd
 import numpy as np
+import copy
+import os
+import re
+from types import SimpleNamespace
+from itertools import product
 np.random.seed(16)
 
 # AIF360 Fairness package
 from aif360.datasets import AdultDataset, GermanDataset
 from aif360.algorithms.preprocessing.optim_preproc_helpers.data_preproc_functions import load_preproc_data_adult, load_preproc_data_german
-from aif360.metrics import ClassificationMetric, BinaryLabelDatasetMetric
-from aif360.algorithms.preprocessing.reweighing import Reweighing
+from aif360.metrics import BinaryLabelDatasetMetric
 
-# SKLearn Packages for data scaaling and model evaluation
-from sklearn.preprocessing import StandardScaler
-from sklearn.metrics import confusion_matrix
+# SKLearn Packages for model evaluation
+from sklearn.neighbors import NearestNeighbors
 from sklearn.model_selection import *
 
+# Joblib to evaluate hyperparameter combinations in parallel, loky to run the 
+# German grid searches in a worker process
+from joblib import Parallel, delayed
+from joblib.externals.loky import ProcessPoolExecutor
+from contextlib import contextmanager
+
 # PyTorch packages to build LogisticRegression 1 layer NN model
 import torch
 import torch.nn as nn
@@ -46,13 +55,26 @@ adult_data_race = load_preproc_data_adult(['race'])
 
 # Load German dataset, define the sensitive feature and adjust binary labels to 0 and 1
 german_data_sex = load_preproc_data_german(['sex'])
-german_data_sex.labels = np.float64(np.where(german_data_sex.labels.copy() > 1, 0, 1))
+german_data_sex.labels = (german_data_sex.labels <= 1).astype(np.float32, copy=False)
 german_data_sex.unfavorable_label = 0.0
 
 german_data_age = load_preproc_data_german(['age'])
-german_data_age.labels = np.float64(np.where(german_data_age.labels.copy() > 1, 0, 1))
+german_data_age.labels = (german_data_age.labels <= 1).astype(np.float32, copy=False)
 german_data_age.unfavorable_label = 0.0
 
+# Store features, labels and instance weights as contiguous float32 arrays once 
+# (the dtype the models are trained in) so no fit or fold has to convert them. 
+# One-hot encoded features (only 0 and 1) are stored as uint8, scaling them 
+# returns float32
+for dataset in (adult_data_sex, adult_data_race, german_data_sex, german_data_age):
+  if np.isin(dataset.features, (0, 1)).all():
+    dataset.features = np.ascontiguousarray(dataset.features, dtype=np.uint8)
+  else:
+    dataset.features = np.ascontiguousarray(dataset.features, dtype=np.float32)
+  dataset.labels = np.ascontiguousarray(dataset.labels, dtype=np.float32)
+  dataset.instance_weights = np.ascontiguousarray(dataset.instance_weights, 
+                                                  dtype=np.float32)
+
 # Shuffle and split data into training (70%) and test (30%) sets
 adult_trn_s, adult_tst_s = adult_data_sex.split([0.7], shuffle=True, seed=16)
 adult_trn_r, adult_tst_r = adult_data_race.split([0.7], shuffle=True, seed=16)
@@ -68,36 +90,57 @@ epochs = 100000
 
 class LogisticRegression(nn.Module):
 
-  def __init__(self, input_features):
+  def __init__(self, input_features, generator=None):
     """
     Constructor for LogisticRegression Class 
 
     Parameters:
       input_features: Number of input features for the model
+      generator: torch.Generator used to initialise the weights and bias, if 
+                 None the global torch RNG is used
     """
 
     super(LogisticRegression, self).__init__()
     self.input_features = input_features
-    self.fc_layer1 = nn.Linear(input_features,1)                                
+    if generator is None:
+      self.fc_layer1 = nn.Linear(input_features,1)                              
+
+    # OTHERWISE BUILD THE LAYER WITHOUT ITS DEFAULT INITIALISATION (WHICH WOULD 
+    # CONSUME THE GLOBAL RNG) AND DRAW IT FROM generator AS nn.Linear DOES
+    else:
+      self.fc_layer1 = nn.utils.skip_init(nn.Linear, input_features, 1)
+      bound = 1 / np.sqrt(input_features)
+      with torch.no_grad():
+        for param in self.fc_layer1.parameters():
+          param.uniform_(-bound, bound, generator=generator)
 
 
   def forward(self, x):
     """
-    Forward pass, one fully connected linear layer with sigmoid activation
+    Forward pass, one fully connected linear layer returning raw logits, the 
+    sigmoid is applied inside BCEWithLogitsLoss (positive logit = label 1)
 
     Parameters:
       x: input data with binary labels (0 or 1) as tensor
 
     Returns:
-      y_predicted: LogisitcRegression predictions  
+      y_predicted: LogisitcRegression logits  
     """
     
-    y_predicted = torch.sigmoid(self.fc_layer1(x))
+    y_predicted = self.fc_layer1(x)
     return y_predicted
 
 """### <font color='#00B2EE'>**CLASS:**</font> FairnessProcessing"""
 
 class FairnessProcessing ():
+
+  # Reweighed instance weights shared by every instance, keyed on the training 
+  # data and sensitive feature so each dataset is only reweighed once
+  _weights_cache = {}
+
+  # Datasets with the sensitive feature(s) removed, keyed on the dataset and 
+  # only_sens so each variant is only sliced once
+  _suppress_cache = {}
   
   def __init__(self, sensitive_feature): 
     """
@@ -131,42 +174,82 @@ class FairnessProcessing ():
     dataset_metrics = BinaryLabelDatasetMetric(dataset, 
                                                unprivileged_groups=self.unpriv, 
                                                privileged_groups=self.priv)
-    print('\033[1mConsistency:\033[0m', dataset_metrics.consistency())
+    print('\033[1mConsistency:\033[0m', self.consistency(dataset))
     print('\033[1mMean Difference:\033[0m', dataset_metrics.mean_difference())
 
 
+  def consistency(self, dataset, n_neighbors=5):
+    """
+    Individual fairness metric, same as AIF360 BinaryLabelDatasetMetric 
+    consistency: 1 - mean(|y_i - mean(y_NN(i))|) over the n_neighbors nearest 
+    neighbours of each sample. The neighbours are found with the same 
+    SKLearn ball tree as AIF360 (so ties at equal distance resolve the same 
+    way) queried on all cores, and the sum is vectorised instead of a Python 
+    loop over every sample
+
+    Parameters: 
+      dataset: binary label AIF360 dataset 
+      n_neighbors: number of neighbours for KNN computation, default is 5
+
+    Returns:
+      consistency: consistency score (float)
+    """
+
+    labels = dataset.labels.ravel()
+    nbrs = NearestNeighbors(n_neighbors=n_neighbors, algorithm='ball_tree', 
+                            n_jobs=-1).fit(dataset.features)
+    _, indices = nbrs.kneighbors(dataset.features)
+    consistency = 1 - np.mean(np.abs(labels - labels[indices].mean(axis=1)))
+    return consistency
+
+
   def accuracy_score(self, y_pred, y_test):                                     
     """
     Returns accuracy score for trained model, used for model evaluation
 
     Parameters:
-      y_pred: label predictions from logistic regression model as array
-      y_test: groundtruth labels from dataset as array
+      y_pred: label predictions from logistic regression model as tensor
+      y_test: groundtruth labels from dataset as tensor
     """
 
-    return np.sum(y_pred==y_test.detach().numpy())/len(y_test)
+    return (y_pred == y_test).float().mean().item()
 
 
-  def equal_opp(self, data_test, test_predictions):                             
+  def equal_opp_labels(self, data_test, predicted_labels):
     """
-    Equality of opportunity fairness metric calculated with AIF360 
-    ClassificationMetrics. A score of 0 indicates no bias. A negative score 
-    indicates bias towards the privileged group and a positive score bias 
-    towards the unprivileged group
+    Equality of opportunity fairness metric, the same value as AIF360 
+    ClassificationMetric.equal_opportunity_difference calculated directly from 
+    the groundtruth labels, protected attributes and instance weights of the 
+    test data. A score of 0 indicates no bias. A negative score indicates bias 
+    towards the privileged group and a positive score bias towards the 
+    unprivileged group. The true positive rate of the unprivileged group 
+    minus the true positive rate of the privileged group. No copy of the test 
+    data is needed to hold the predictions, and the test data may be a 
+    cross-validation fold created by ProcessData.subset_arrays
 
     Parameters:
-      data_test: test subset of AIF360 binary label dataset as array 
-      test_predictions: test subset of AIF360 binary label dataset with 
-                        groundtruth labels replaced with model label predictions
+      data_test: test subset of original dataset
+      predicted_labels: label predictions from logistic regression model as 
+                        array
     
     Returns:
       equal_opp: Equality of opportunity calcualtion (float)
     """
 
-    metric = ClassificationMetric(data_test, test_predictions, 
-                                  unprivileged_groups=self.unpriv, 
-                                  privileged_groups=self.priv)
-    equal_opp = metric.equal_opportunity_difference()
+    sens_index = data_test.protected_attribute_names.index(self.sensitive_feature)
+    groups = data_test.protected_attributes[:, sens_index]
+    weights = data_test.instance_weights
+    positive = data_test.labels.ravel() == data_test.favorable_label
+    true_positive = positive & (np.ravel(predicted_labels) == 
+                                data_test.favorable_label)
+
+    tpr = []
+    for group in (self.unpriv[0][self.sensitive_feature], 
+                  self.priv[0][self.sensitive_feature]):
+      in_group = groups == group
+      tpr.append(np.sum(weights[true_positive & in_group]) / 
+                 np.sum(weights[positive & in_group]))
+    equal_opp = tpr[0] - tpr[1]
     return equal_opp
 
 
@@ -174,27 +257,72 @@ class FairnessProcessing ():
     """
     Pre-processing method to reweigh the data based on each combination of 
     sensitive group and label. This technique should be applied to the training 
-    data before passed to the classification mdoel
+    data before passed to the classification mdoel. The weights are the same 
+    as AIF360 Reweighing and come from reweigh_weights, so they are only 
+    calculated once per training dataset
 
     Paramters: 
       data_train: training subset of original dataset as array
 
     Returns: 
-      data_reweighed: AIF360 binary label dataset with adjusted instance weights
+      data_reweighed: shallow copy of the AIF360 binary label dataset with 
+                      adjusted instance weights
     """
 
-    rwt = Reweighing(unprivileged_groups = self.unpriv,                         
-                    privileged_groups = self.priv)                              
-    rwt.fit(data_train)
-    data_reweighed = rwt.transform(data_train)
+    data_reweighed = copy.copy(data_train)
+    data_reweighed.instance_weights = self.reweigh_weights(data_train)
     return data_reweighed
 
 
+  def reweigh_weights (self, data_train):
+    """
+    Instance weights of the reweighing pre-processing method (see reweigh) 
+    calculated directly from the labels, protected attributes and instance 
+    weights of the training data. Each instance weight is multiplied by 
+    P(group) * P(label) / P(group, label) for its combination of sensitive 
+    group and label. Works on AIF360 datasets as well as the cross-validation 
+    folds created by ProcessData.subset_arrays. The weights are cached per 
+    training data and sensitive feature
+
+    Paramters: 
+      data_train: training subset of original dataset
+
+    Returns: 
+      weights: reweighed instance weights as float32 array
+    """
+
+    key = (id(data_train), self.sensitive_feature)
+    cached = FairnessProcessing._weights_cache.get(key)
+    if cached is not None and cached[0] is data_train:
+      return cached[1]
+
+    sens_index = data_train.protected_attribute_names.index(self.sensitive_feature)
+    groups = data_train.protected_attributes[:, sens_index]
+    labels = data_train.labels.ravel()
+    instance_weights = data_train.instance_weights
+    n = np.sum(instance_weights, dtype=np.float64)
+
+    weights = instance_weights.copy()
+    for group in (self.unpriv[0][self.sensitive_feature], 
+                  self.priv[0][self.sensitive_feature]):
+      for label in (data_train.favorable_label, data_train.unfavorable_label):
+        in_group = groups == group
+        with_label = labels == label
+        n_group = np.sum(instance_weights[in_group], dtype=np.float64)
+        n_label = np.sum(instance_weights[with_label], dtype=np.float64)
+        n_both = np.sum(instance_weights[in_group & with_label], dtype=np.float64)
+        weights[in_group & with_label] *= n_group * n_label / (n * n_both)
+    weights = weights.astype(np.float32, copy=False)
+    FairnessProcessing._weights_cache[key] = (data_train, weights)
+    return weights
+
+
   def suppress_sens(self, data_train, data_test, 
                     suppress_sens=True, only_sens=True ):
     """
     Pre-processing method to remove the sensitive feature(s) from the AIF360 
-    binary label dataset before training the classifier
+    binary label dataset before training the classifier. Each suppressed 
+    dataset is built once and reused by every later call (see suppress)
 
     Parameters:
       data_train: training subset of original dataset as array
@@ -204,24 +332,51 @@ class FairnessProcessing ():
                  both sensitive features in the dataset
 
     Returns: 
-      train: copy of training subset of original dataset with sensitive 
-             feature(s) removed
-      test: copy of test subset of original dataset with sensitive feature(s) 
-            removed
+      train: shallow copy of training subset of original dataset with 
+             sensitive feature(s) removed
+      test: shallow copy of test subset of original dataset with sensitive 
+            feature(s) removed
     """
-    train = data_train.copy()
-    test = data_test.copy()
     if suppress_sens == True:
-      if only_sens == True:
-        train.features = train.features[:, 1:]
-        test.features = test.features[:, 1:]                          
-      else:
-        train.features = train.features[:, 2:]
-        test.features = test.features[:, 2:]
+      train = self.suppress(data_train, only_sens)
+      test = self.suppress(data_test, only_sens)
+    else:
+      train = copy.copy(data_train)
+      test = copy.copy(data_test)
     
     return train, test
 
 
+  def suppress (self, dataset, only_sens=True):
+    """
+    Remove the sensitive feature(s) from one AIF360 binary label dataset. The 
+    result is cached per dataset and only_sens, so the remaining feature 
+    columns are only copied into a contiguous array once
+
+    Parameters:
+      dataset: AIF360 binary label dataset
+      only_sens: default True removes the first sensitive feature, False removes 
+                 both sensitive features in the dataset
+
+    Returns: 
+      suppressed: shallow copy of the dataset with sensitive feature(s) removed, 
+                  the features are a read-only contiguous array
+    """
+
+    key = (id(dataset), only_sens)
+    cached = FairnessProcessing._suppress_cache.get(key)
+    if cached is not None and cached[0] is dataset:
+      return cached[1]
+
+    # SHALLOW COPY SHARING EVERY ARRAY EXCEPT THE SLICED FEATURES
+    suppressed = copy.copy(dataset)
+    n_drop = 1 if only_sens == True else 2
+    suppressed.features = np.ascontiguousarray(dataset.features[:, n_drop:])
+    suppressed.features.flags.writeable = False
+    FairnessProcessing._suppress_cache[key] = (dataset, suppressed)
+    return suppressed
+
+
   def tradeoff_metric (self, accuracy, fairness):
     """
     Custom trade-off metric for accuracy and fairness. The square of the 
@@ -231,7 +386,7 @@ class FairnessProcessing ():
 
     Parameters:
       accuracy: accuracy score as calculated by accuracy_score
-      fairness: fairness score as calculated by equal_opp
+      fairness: fairness score as calculated by equal_opp_labels
 
     Returns: 
       tradeoff_metric: calculated trade-off value 
@@ -248,15 +403,15 @@ class ProcessData():
     Constructor for ProcessData class 
     """
 
-    self.sc = StandardScaler()
-
 
   def scale_data (self, data_train, data_test):
     """
-    SKLearn standard scaler applied to fit and transform training data and 
-    ransform test data so that the mean is equal to zero with a standard 
-    deviation of 1. Train and test label arrays converted to contiguous 
-    flattened arrays
+    Standard scaling with NumPy broadcasting, the mean and standard deviation 
+    of the training data are used to transform the training and test data so 
+    that the mean is equal to zero with a standard deviation of 1 (same as the 
+    SKLearn StandardScaler, constant features are only centred), scaled 
+    features are returned as float32. Train and test label arrays converted to 
+    contiguous flattened arrays
 
     Parameters:
       data_train: training subset of original dataset as array
@@ -269,23 +424,59 @@ class ProcessData():
       y_test: flattened array of test labels
     """
 
-    x_train = self.sc.fit_transform(data_train.features)                        
+    # TRAINING MEAN AND STANDARD DEVIATION, ACCUMULATED IN FLOAT64
+    mu = data_train.features.mean(axis=0, dtype=np.float64)
+    sigma = data_train.features.std(axis=0, dtype=np.float64)
+    sigma[sigma == 0] = 1.0
+    mu, sigma = mu.astype(np.float32), sigma.astype(np.float32)
+
+    x_train = ((data_train.features - mu) / sigma).astype(np.float32, copy=False)
     y_train = data_train.labels.ravel()                                         
-    x_test = self.sc.transform(data_test.features)                              
+    x_test = ((data_test.features - mu) / sigma).astype(np.float32, copy=False)
     y_test = data_test.labels.ravel()
     return x_train, x_test, y_train, y_test
 
 
-  def cnvt_tensor (self, x_train, x_test, y_train, y_test):
+  def subset_arrays (self, data, index):
     """
-    Convert numpy arrays to tesnors in order to pass data to LogisticRegression 
-    model
+    Lightweight alternative to the AIF360 .subset method for cross-validation 
+    folds. Only the arrays used to train and evaluate the model are indexed, 
+    the deep copy of the whole AIF360 dataset is skipped
+
+    Parameters:
+      data: AIF360 binary label dataset
+      index: indices of the rows in the subset as array
+
+    Returns:
+      subset: namespace with the features, labels, protected_attributes and 
+              instance_weights of the subset as well as the 
+              protected_attribute_names, favorable_label and unfavorable_label 
+              of the dataset
+    """
+
+    subset = SimpleNamespace(features=data.features[index],
+                             labels=data.labels[index],
+                             protected_attributes=data.protected_attributes[index],
+                             instance_weights=data.instance_weights[index],
+                             protected_attribute_names=data.protected_attribute_names,
+                             favorable_label=data.favorable_label,
+                             unfavorable_label=data.unfavorable_label)
+    return subset
+
+
+  def cnvt_tensor (self, x_train, x_test, y_train, y_test, device='cpu'):
+    """
+    Convert numpy arrays to float32 tesnors in order to pass data to 
+    LogisticRegression model and move them to the device the model is trained 
+    on. Arrays that are already contiguous float32 are shared with the tensor, 
+    not copied
 
     Parameters:
       x_train: scaled training feature data as array
       x_test: scaled test feature data as array
       y_train: flattened array of training labels
       y_test: flattened array of test labels
+      device: torch device to store the tensors on, default is cpu
 
     Returns:
       x_train: scaled training feature data as tensor
@@ -295,14 +486,20 @@ class ProcessData():
 
     """ 
                                                                                 
-    x_train, x_test = torch.Tensor(x_train),torch.Tensor(x_test)
-    y_train, y_test = torch.Tensor(y_train),torch.Tensor(y_test) 
+    x_train, x_test, y_train, y_test = (
+        torch.from_numpy(np.ascontiguousarray(a, dtype=np.float32))
+             .to(device, non_blocking=True)
+        for a in (x_train, x_test, y_train, y_test))
     return x_train, x_test, y_train, y_test
 
 """### <font color='#00B2EE'>**CLASS:**</font> EvaluateModel"""
 
 class EvaluateModel():
 
+  # Fitted models shared by every instance, keyed on the train / test datasets 
+  # and the training settings so an identical configuration is only trained once
+  _model_cache = {}
+
   def __init__ (self, sensitive_feature):
     """
     Constructor for EvaluateModel class
@@ -316,15 +513,61 @@ class EvaluateModel():
     self.priv = [{self.sensitive_feature: 1}]
     self.PD = ProcessData()
     self.FP = FairnessProcessing(self.sensitive_feature)
+    self.device = torch.device('cuda' if torch.cuda.is_available() else 'cpu')
+    self._fold_cache = {}
+    self._stack_cache = {}
+
+  def fit_lbfgs (self, model, x_train, y_train, loss_function, reg, 
+                 max_iter=50):
+    """
+    Full-batch L-BFGS alternative to the SGD training loop. The L2 penalty 
+    0.5 * reg * ||w||^2 is added to the loss so the objective matches SGD with 
+    weight_decay=reg. Converges in tens of iterations instead of thousands of 
+    epochs
+
+    Parameters:
+      model: LogisticRegression model being trained
+      x_train: scaled training feature data as tensor
+      y_train: training labels as tensor
+      loss_function: PyTorch loss function (reweighed or standard 
+                     BCEWithLogitsLoss)
+      reg: L2 regularisation strength 
+      max_iter: maximum number of L-BFGS iterations, default is 50
+
+    Returns:
+      n_iter: number of L-BFGS iterations run
+    """
+
+    optimiser = torch.optim.LBFGS(model.parameters(), 
+                                  lr=1.0, 
+                                  max_iter=max_iter, 
+                                  tolerance_grad=1e-5, 
+                                  line_search_fn='strong_wolfe')
+
+    def closure():
+      optimiser.zero_grad(set_to_none=True)
+      y_pred = model(x_train)
+      loss = loss_function(torch.squeeze(y_pred), y_train)
+      loss = loss + 0.5 * reg * sum(p.pow(2).sum() for p in model.parameters())
+      loss.backward()
+      return loss
+
+    optimiser.step(closure)
+    return optimiser.state_dict()['state'][0]['n_iter']
+
 
   def fit (self, data_train, data_test, lr, reg, epochs, reweight=False, 
-           suppress_sens=False, only_sens=True):
+           suppress_sens=False, only_sens=True, solver='sgd', verbose=True, 
+           patience=1, seed=16):
     """
     Function to train the LogisticRegression model on training data. PyTorch 
     Binary Cross Entropy Loss and Stochastic Gradient Descent optimiser are used 
     to calculate the loss and udpate the model weights at each epoch. Stopping 
-    criteria implemented to break training once the loss converges to 1e-3 
-    (based on SKLearn's SGDClassifier early_stopping criteria)
+    criteria implemented to break training once the training loss converges to 
+    1e-3 (based on SKLearn's SGDClassifier early_stopping criteria). Alternatively 
+    the model can be fit with L-BFGS (see fit_lbfgs). Results are memoised, 
+    repeating a fit on the same datasets with the same settings and sensitive 
+    feature returns a copy of the cached results without retraining
 
     Parameters:
       data_train: training subset of original dataset as array
@@ -338,6 +581,14 @@ class EvaluateModel():
                      False, do not remove sensitive features from the dataset
       only_sens: if True, only remove the first sensitive feature from the 
                  dataset. If False, remove both sensitive features
+      solver: 'sgd' (default) trains with SGD for up to epochs epochs, 'lbfgs' 
+              trains with full-batch L-BFGS (lr and epochs are not used)
+      verbose: if True (default), show a progress bar of the training epochs
+      patience: number of consecutive stopping checks (every 100 epochs) 
+                without a 1e-3 improvement of the training loss before training 
+                stops, default 1 stops at the first check without improvement
+      seed: seed of the torch.Generator initialising the model weights, so the 
+            fit does not depend on the global torch RNG
 
     Returns: 
       fit_data: dictionary of model training data, keys = accuracy, fair, 
@@ -346,76 +597,156 @@ class EvaluateModel():
                         labels replaced with model predictions
     """
 
-    fit_data = {}
-
-    # SUPPRESS ONE OR BOTH SENSITIVE FEATURES IF TRUE 
+    # REBUILD THE RESULTS FROM THE CACHE IF THIS CONFIGURATION WAS ALREADY 
+    # TRAINED, THE DATASETS ARE STORED WITH THE RESULTS SO A REUSED id CANNOT 
+    # MATCH AND THE SENSITIVE FEATURE IS PART OF THE KEY AS IT DEFINES FAIRNESS. 
+    # ONLY THE METRICS AND PREDICTED LABELS ARE CACHED, NOT THE AIF360 DATASET
+    key = (self.sensitive_feature, id(data_train), id(data_test), lr, reg, 
+           epochs, reweight, suppress_sens, only_sens, solver, patience, seed)
+    cached = EvaluateModel._model_cache.get(key)
+    trained = not (cached is not None and cached[0] is data_train 
+                   and cached[1] is data_test)
+    if trained == False:
+      fit_data, predicted_labels = dict(cached[2]), cached[3].copy()
+    orig_train, orig_test = data_train, data_test
+
+    # SUPPRESS ONE OR BOTH SENSITIVE FEATURES IF TRUE (CACHED, SO A CACHE HIT 
+    # GETS BACK THE SAME SUPPRESSED TEST DATASET)
     if suppress_sens == True:
       data_train, data_test = self.FP.suppress_sens(data_train, 
                                                     data_test, 
                                                     suppress_sens=suppress_sens, 
                                                     only_sens=only_sens)
-      n_samples, n_features = data_train.features.shape 
-    else:
-      n_samples, n_features = data_train.features.shape                        
 
-    # DEFINE AND SCALE THE TEST AND TRAIN DATA 
-    x_train, x_test, y_train, y_test = self.PD.scale_data(data_train, 
-                                                          data_test) 
-               
-    x_train, x_test, y_train, y_test = self.PD.cnvt_tensor(x_train, 
-                                                           x_test, 
-                                                           y_train, 
-                                                           y_test)
+    if trained == True:
+      # DEFINE AND SCALE THE TEST AND TRAIN DATA 
+      x_train, x_test, y_train, y_test = self.PD.scale_data(data_train, 
+                                                            data_test) 
+                 
+      x_train, x_test, y_train, y_test = self.PD.cnvt_tensor(x_train, 
+                                                             x_test, 
+                                                             y_train, 
+                                                             y_test,
+                                                             self.device)
+
+      # REWEIGH THE TRAINING DATA IF reweight IS TRUE
+      weights = None
+      if reweight == True:                                                      
+        weights = torch.from_numpy(self.FP.reweigh_weights(data_train))
+        weights = weights.to(self.device)
+
+      fit_data, predicted_labels = self.fit_from_tensors(data_test, 
+                                                         x_train, 
+                                                         x_test, 
+                                                         y_train, 
+                                                         y_test, 
+                                                         lr, 
+                                                         reg, 
+                                                         epochs, 
+                                                         weights=weights, 
+                                                         solver=solver,
+                                                         verbose=verbose,
+                                                         patience=patience,
+                                                         seed=seed)
+
+      EvaluateModel._model_cache[key] = (orig_train, orig_test, 
+                                         dict(fit_data), 
+                                         predicted_labels.copy())
+
+    # TEST DATASET WITH LABELS REPLACED BY THE MODEL PREDICTIONS, THE SHALLOW 
+    # COPY SHARES ALL ARRAYS WITH data_test EXCEPT THE NEW LABELS
+    test_predictions = copy.copy(data_test)                                      
+    test_predictions.labels = predicted_labels.reshape(-1, 1)
+
+    return fit_data, test_predictions                                         
 
 
-    # DEFINE SGD OPTIMISER WITH L2 REGULARISATION (weight_decay)
-    model = LogisticRegression(n_features)
-    optimiser = torch.optim.SGD(model.parameters(),
-                                lr=lr, 
-                                weight_decay=reg)     
+  def fit_from_tensors (self, data_test, x_train, x_test, y_train, y_test, 
+                        lr, reg, epochs, weights=None, solver='sgd', 
+                        verbose=False, patience=1, seed=16):
+    """
+    Train and evaluate the LogisticRegression model on data that has already 
+    been suppressed, scaled and converted to tensors (see fit and prepare_folds)
+
+    Parameters:
+      data_test: test subset of original dataset or cross-validation fold
+      x_train: scaled training feature data as tensor
+      x_test: scaled test feature data as tensor
+      y_train: training labels as tensor
+      y_test: test labels as tensor
+      lr: learning rate hyperparameter
+      reg: L2 regularisation strength 
+      epochs: number of training epochs
+      weights: reweighed instance weights of the training data as tensor, if 
+               None the training data is not reweighed
+      solver: 'sgd' (default) or 'lbfgs', see fit
+      verbose: if True, show a progress bar of the training epochs
+      patience: number of stopping checks without improvement, see fit
+      seed: seed of the weight initialisation, see fit
 
-    # ADJUST BCELOSS FUNCTION BASED ON REWEIGHTING TRUE OR FALSE
+    Returns: 
+      fit_data: dictionary of model training data, keys = accuracy, fair, 
+                tradeoff, epoch 
+      predicted_labels: label predictions for the test data as array
+    """
+
+    fit_data = {}
+    n_samples, n_features = x_train.shape
+    reweight = weights is not None
+
+    generator = torch.Generator().manual_seed(seed)
+    model = LogisticRegression(n_features, generator=generator).to(self.device)
+
+    # ADJUST BCEWITHLOGITSLOSS FUNCTION BASED ON REWEIGHTING TRUE OR FALSE
     if reweight == True:                                                        
-      rwt = self.FP.reweigh(data_train)
-      weights = torch.tensor(rwt.instance_weights.copy())
-      loss_function_rwt = nn.BCELoss(weight=weights)
-      loss_function = nn.BCELoss()
+      loss_function = nn.BCEWithLogitsLoss(weight=weights)
     else:
-      loss_function = nn.BCELoss()
+      loss_function = nn.BCEWithLogitsLoss()
     
-    # TRAIN THE MODEL ON SET HYPERPARAMETERS
-    iter = 0
-    best_loss = 10
-    for epoch in tqdm(range(epochs)):
-      optimiser.zero_grad()
-      y_pred = model(x_train)
-      if reweight == True:
-        loss = loss_function_rwt(torch.squeeze(y_pred), y_train)
-      else:
+    # TRAIN THE MODEL WITH L-BFGS IF SELECTED
+    if solver == 'lbfgs':
+      iter = self.fit_lbfgs(model, x_train, y_train, loss_function, reg)
+
+    # OTHERWISE TRAIN THE MODEL ON SET HYPERPARAMETERS WITH SGD
+    else:
+      # DEFINE SGD OPTIMISER WITH L2 REGULARISATION (weight_decay)
+      optimiser = torch.optim.SGD(model.parameters(),
+                                  lr=lr, 
+                                  weight_decay=reg,
+                                  foreach=True)     
+
+      iter = 0
+      best_loss = 10
+      wait = 0
+      for epoch in tqdm(range(epochs), mininterval=5.0, miniters=1000, 
+                        disable=not verbose):
+        optimiser.zero_grad(set_to_none=True)
+        y_pred = model(x_train)
         loss = loss_function(torch.squeeze(y_pred), y_train)
-      loss.backward()
-      optimiser.step()
-      
-      # STOPPING CRITERIA WHEN LOSS CONVERGES AT 1e-3
-      iter+=1
-      if iter%100 == 0:
-        y_pred_validate = model(x_test)
-        loss_validate = loss_function(torch.squeeze(y_pred_validate), y_test)
-        if loss_validate > (best_loss - 1e-3):
-          break
-        else:
-          best_loss = loss_validate
+        loss.backward()
+        optimiser.step()
+        
+        # STOPPING CRITERIA WHEN THE TRAINING LOSS CONVERGES AT 1e-3 FOR 
+        # patience CONSECUTIVE CHECKS
+        iter+=1
+        if iter%100 == 0:
+          train_loss = loss.item()
+          if train_loss > (best_loss - 1e-3):
+            wait += 1
+            if wait >= patience:
+              break
+          else:
+            best_loss = train_loss
+            wait = 0
         
-    with torch.no_grad():
+    with torch.inference_mode():
       # CALCULATE THE ACCURACY OF THE TEST PREDICTIONS VS. TEST LABELS
-      y_pred_test = torch.squeeze(model(x_test))                             
-      predicted_labels = y_pred_test.round().detach().numpy()
-      fit_data['accuracy'] = self.FP.accuracy_score(predicted_labels, y_test)
+      y_pred_test = (torch.squeeze(model(x_test)) > 0).float()
+      fit_data['accuracy'] = self.FP.accuracy_score(y_pred_test, y_test)
+      predicted_labels = y_pred_test.cpu().numpy()
       
       # CALCULATE THE FAIRNESS OF MODEL USING TEST DATASET AND PREDICTED LABELS
-      test_predictions = data_test.copy()                                      
-      test_predictions.labels = predicted_labels
-      fit_data['fair'] = self.FP.equal_opp(data_test, test_predictions)
+      fit_data['fair'] = self.FP.equal_opp_labels(data_test, predicted_labels)
 
       # CALCULATE TRADE-OFF METRIC FOR THE MODEL
       fit_data['tradeoff'] = self.FP.tradeoff_metric(fit_data['accuracy'], 
@@ -423,15 +754,252 @@ class EvaluateModel():
 
       fit_data['epoch'] = iter
 
-    return fit_data, test_predictions                                         
-  
+    return fit_data, predicted_labels
 
-  def cross_validation (self, data_train, lr, reg, epochs, reweight=False,
-                        k=5, suppress_sens=False, only_sens=True):
+
+  def stack_folds (self, folds):
+    """
+    Stack the pre-processed folds into zero-padded tensors for fit_grid. The 
+    stacked tensors only depend on the folds so they are cached and reused by 
+    every grid of hyperparameters trained on the same folds
+
+    Parameters:
+      folds: pre-processed folds generated by prepare_folds
+
+    Returns:
+      x_train: (K, n_rows, n_features + 1) training features of every fold 
+               with a column of ones for the bias as tensor
+      x_train_t: (K, n_features + 1, n_rows) contiguous transpose of x_train 
+                 for the gradient as tensor
+      x_test: (K, n_rows, n_features + 1) test features of every fold with a 
+              column of ones for the bias as tensor
+      y_train: (K, n_rows) training labels of every fold as tensor
+      weights: (K, n_rows, 1) instance weights of every fold divided by the 
+               fold size, zero for padded rows, as tensor
+    """
+
+    key = id(folds)
+    if key in self._stack_cache and self._stack_cache[key][0] is folds:
+      return self._stack_cache[key][1]
+
+    # STACK THE ZERO-PADDED FOLDS WITH A COLUMN OF ONES APPENDED SO THE BIAS IS 
+    # THE LAST ROW OF THE WEIGHT MATRIX
+    x_train = nn.utils.rnn.pad_sequence([torch.cat([x, torch.ones_like(x[:, :1])], 1) 
+                                         for _, x, _, _, _, _ in folds], 
+                                        batch_first=True)
+    x_test = nn.utils.rnn.pad_sequence([torch.cat([x, torch.ones_like(x[:, :1])], 1) 
+                                        for _, _, x, _, _, _ in folds], 
+                                       batch_first=True)
+    y_train = nn.utils.rnn.pad_sequence([y for _, _, _, y, _, _ in folds], 
+                                        batch_first=True)
+
+    # PADDED ROWS HAVE ZERO WEIGHT SO THEY DO NOT CONTRIBUTE TO THE LOSS, THE 
+    # WEIGHTS ARE DIVIDED BY THE FOLD SIZE SO SUMS OVER ROWS ARE FOLD MEANS
+    weights = nn.utils.rnn.pad_sequence([torch.ones_like(y) if w is None else w 
+                                         for _, _, _, y, _, w in folds], 
+                                        batch_first=True).unsqueeze(2)
+    n_train = torch.tensor([len(y) for _, _, _, y, _, _ in folds], 
+                           dtype=x_train.dtype, device=self.device)
+    weights = weights / n_train.view(-1, 1, 1)
+
+    # TRANSPOSED COPY FOR THE GRADIENT, MADE ONCE INSTEAD OF EVERY EPOCH
+    x_train_t = x_train.transpose(1, 2).contiguous()
+
+    stacked = (x_train, x_train_t, x_test, y_train, weights)
+    self._stack_cache[key] = (folds, stacked)
+    return stacked
+
+
+  def fit_grid (self, folds, learning_rates, reg_strength, epochs, 
+                verbose=False, patience=1, seed=16):
+    """
+    Train one LogisticRegression model per (learning rate, regularisation) 
+    pair on every cross-validation fold with SGD as a single batched model. The 
+    folds are stacked once (see stack_folds) and the weights and bias of all 
+    K folds x G models are stacked in one (K, n_features + 1, G) tensor, so 
+    each epoch is one batched matrix multiplication for every fold and 
+    combination plus one for the analytic gradient. Every model follows the 
+    same SGD update and stopping criteria as fit_from_tensors and stops 
+    updating once its own loss converges
+
+    Parameters:
+      folds: pre-processed folds generated by prepare_folds
+      learning_rates: learning rate of each model as list of length G
+      reg_strength: L2 regularisation strength of each model as list of 
+                    length G
+      epochs: number of training epochs
+      verbose: if True, show a progress bar of the training epochs
+      patience: number of stopping checks without improvement, see fit
+      seed: seed of the weight initialisation, see fit
+
+    Returns: 
+      grid_data: list for each fold of the fit_data dictionaries for each 
+                 model, keys = accuracy, fair, tradeoff, epoch 
+    """
+
+    n_folds = len(folds)
+    n_models = len(learning_rates)
+    n_features = folds[0][1].shape[1]
+    dtype = folds[0][1].dtype
+    lr_vec = torch.tensor(learning_rates, dtype=dtype, device=self.device)
+    reg_vec = torch.tensor(reg_strength, dtype=dtype, device=self.device)
+
+    # ALL FOLDS AS ZERO-PADDED TENSORS, SHARED BY EVERY CALL ON THE SAME FOLDS
+    x_train, x_train_t, x_test, y_train, weights = self.stack_folds(folds)
+    y_train_grid = y_train.unsqueeze(2).expand(-1, -1, n_models)
+
+    # INITIALISE THE WEIGHTS AND BIAS OF EVERY MODEL AS nn.Linear DOES, FROM A 
+    # GENERATOR OWNED BY THIS CALL SO CONCURRENT GRID SEARCHES ARE REPRODUCIBLE
+    bound = 1 / np.sqrt(n_features)
+    generator = torch.Generator(device=self.device).manual_seed(seed)
+    W = torch.empty(n_folds, n_features + 1, n_models, dtype=dtype, 
+                    device=self.device).uniform_(-bound, bound, 
+                                                 generator=generator)
+
+    # BUFFERS REUSED BY EVERY EPOCH SO THE LOOP DOES NOT ALLOCATE
+    logits = torch.empty_like(y_train_grid)
+    residual = torch.empty_like(y_train_grid)
+    grad = torch.empty_like(W)
+
+    # TRAIN ALL MODELS ON THEIR SET HYPERPARAMETERS
+    active = torch.ones(n_folds, n_models, dtype=torch.bool, device=self.device)
+    step = (lr_vec * active).unsqueeze(1)
+    best_loss = torch.full((n_folds, n_models), 10.0, device=self.device)
+    wait = torch.zeros(n_folds, n_models, dtype=torch.long, device=self.device)
+    epoch_train = torch.full((n_folds, n_models), epochs, dtype=torch.long)
+    iter = 0
+    for epoch in tqdm(range(epochs), mininterval=5.0, miniters=1000, 
+                      disable=not verbose):
+      torch.bmm(x_train, W, out=logits)
+
+      # ANALYTIC GRADIENT OF THE WEIGHTED MEAN BCE LOSS, X^T (w * (p - y)) / n
+      torch.sigmoid(logits, out=residual)
+      residual.sub_(y_train_grid).mul_(weights)
+      torch.bmm(x_train_t, residual, out=grad)
+
+      # SGD STEP WITH L2 REGULARISATION (weight_decay), CONVERGED MODELS FROZEN
+      grad.addcmul_(W, reg_vec)
+      W.addcmul_(grad, step, value=-1)
+
+      # STOPPING CRITERIA WHEN THE TRAINING LOSS OF A MODEL CONVERGES AT 1e-3 
+      # FOR patience CONSECUTIVE CHECKS, THE LOSS IS ONLY EVALUATED WHEN IT IS 
+      # CHECKED
+      iter+=1
+      if iter%100 == 0:
+        train_loss = nn.functional.binary_cross_entropy_with_logits(
+            logits, y_train_grid, reduction='none')
+        train_loss = (train_loss * weights).sum(1)
+        stalled = train_loss > (best_loss - 1e-3)
+        wait = (wait + 1) * stalled
+        best_loss = torch.where(active & ~stalled, train_loss, best_loss)
+        converged = active & (wait >= patience)
+        epoch_train[converged.cpu()] = iter
+        active &= ~converged
+        step = (lr_vec * active).unsqueeze(1)
+        if not active.any():
+          break
+
+    with torch.inference_mode():
+      y_pred_grid = (torch.bmm(x_test, W) > 0).float()
+      predicted_grid = y_pred_grid.cpu().numpy()
+
+    grid_data = []
+    for k, (test_fold, _, _, _, y_test, _) in enumerate(folds):
+      n_test = len(y_test)
+      fold_data = []
+      for g in range(n_models):
+        fit_data = {}
+        # CALCULATE THE ACCURACY OF THE TEST PREDICTIONS VS. TEST LABELS
+        fit_data['accuracy'] = self.FP.accuracy_score(y_pred_grid[k, :n_test, g], 
+                                                      y_test)
+        predicted_labels = predicted_grid[k, :n_test, g]
+
+        # CALCULATE THE FAIRNESS OF MODEL USING TEST DATASET AND PREDICTED LABELS
+        fit_data['fair'] = self.FP.equal_opp_labels(test_fold, predicted_labels)
+
+        # CALCULATE TRADE-OFF METRIC FOR THE MODEL
+        fit_data['tradeoff'] = self.FP.tradeoff_metric(fit_data['accuracy'], 
+                                                       fit_data['fair'])
+
+        fit_data['epoch'] = epoch_train[k, g].item()
+        fold_data.append(fit_data)
+      grid_data.append(fold_data)
+
+    return grid_data
+
+
+  def prepare_folds (self, data_train, reweight=False, k=5, 
+                     suppress_sens=False, only_sens=True):
     """
     SKLearn StratifiedKFold used to split the data into k-folds with the same 
-    distribution of labels. Cross validation implemented across all folds and 
-    the mean accuracy, fairness, trade-off and epochs are calculated and stored
+    distribution of labels. Each fold is suppressed, scaled, converted to 
+    tensors and reweighed once and cached, so that the same folds can be reused 
+    for every hyperparameter combination without repeating the pre-processing. 
+    Folds are indexed views of the dataset arrays (see 
+    ProcessData.subset_arrays) rather than AIF360 dataset copies
+
+    Parameters:
+      data_train: training subset of original dataset as array
+      reweight: if True, reweigh the training data of each fold
+      k: number of folds to split the training data into, default is 5
+      suppress_sens: if True, remove sensitive feature(s) from the dataset. If 
+                     False, do not remove sensitive features from the dataset
+      only_sens: if True, only remove the first sensitive feature from the 
+                 dataset. If False, remove both sensitive features
+
+    Returns:
+      folds: list of tuples (test_fold, x_train, x_test, y_train, y_test, 
+             weights) for each fold, test_fold holds the test arrays used for 
+             the fairness metric, weights is None if the fold is not reweighed
+    """
+
+    key = (id(data_train), reweight, k, suppress_sens, only_sens)
+    if key in self._fold_cache and self._fold_cache[key][0] is data_train:
+      return self._fold_cache[key][1]
+
+    # NUMBER OF K-FOLDS
+    kf = StratifiedKFold(n_splits=k, shuffle=True, random_state=16)                              
+    data = data_train
+
+    # SUPPRESS SENSITIVE GROUP ONCE FOR ALL FOLDS IF suppress_sens IS TRUE
+    if suppress_sens == True:
+      data, _ = self.FP.suppress_sens(data_train, 
+                                      data_train,
+                                      suppress_sens=suppress_sens, 
+                                      only_sens=only_sens)
+    folds = []
+    
+    for train_index, test_index in kf.split(data.features, data.labels):        # Iterate over folds and pre-process the data (regular, suppressed or reweighted as defined in args)
+      train_fold = self.PD.subset_arrays(data, train_index)                     # Define the train and test folds based on the StratifiedKFold generated indices
+      test_fold = self.PD.subset_arrays(data, test_index)                       
+      weights = None
+      
+      # REWEIGH THE DATA IF reweigh IS TRUE (NOT APPLIED TO SUPPRESSED DATA)
+      if suppress_sens == False and reweight == True:
+        weights = self.FP.reweigh_weights(train_fold)
+        weights = torch.from_numpy(weights).to(self.device)
+
+      x_train, x_test, y_train, y_test = self.PD.scale_data(train_fold, 
+                                                            test_fold)
+      x_train, x_test, y_train, y_test = self.PD.cnvt_tensor(x_train, 
+                                                             x_test, 
+                                                             y_train, 
+                                                             y_test,
+                                                             self.device)
+      folds.append((test_fold, x_train, x_test, y_train, y_test, weights))
+
+    self._fold_cache[key] = (data_train, folds)
+    return folds
+
+
+  def cross_validation (self, data_train, lr, reg, epochs, reweight=False,
+                        k=5, suppress_sens=False, only_sens=True, solver='sgd',
+                        folds=None, verbose=False, patience=1, n_jobs=-1, 
+                        seed=16):
+    """
+    Cross validation implemented across all k-folds (see prepare_folds) and 
+    the mean accuracy, fairness, trade-off and epochs are calculated and stored. 
+    With SGD the folds are trained together as one batched model (see fit_grid)
 
     Parameters:
       data_train: training subset of original dataset as array
@@ -445,6 +1013,15 @@ class EvaluateModel():
                      False, do not remove sensitive features from the dataset
       only_sens: if True, only remove the first sensitive feature from the 
                  dataset. If False, remove both sensitive features
+      solver: optimiser used to fit each fold, 'sgd' (default) or 'lbfgs'
+      folds: pre-processed folds generated by prepare_folds, if None the folds 
+             are generated from data_train
+      verbose: if True, show a progress bar of the training epochs
+      patience: number of stopping checks without improvement, see fit
+      n_jobs: number of threads fitting the folds in parallel when the solver 
+              is not 'sgd', default -1 uses all cores, 1 fits the folds 
+              sequentially
+      seed: seed of the weight initialisation, see fit
 
     Returns: 
       mean_metrics: dictionary of mean accuracy, fairness, trade-off and epoch 
@@ -452,9 +1029,12 @@ class EvaluateModel():
                     acc, fair, tradeoff
     """
 
-    # NUMBER OF K-FOLDS
-    kf = StratifiedKFold(n_splits=k, shuffle=True, random_state=16)                              
-    data = data_train.copy()                                                    
+    if folds is None:
+      folds = self.prepare_folds(data_train, 
+                                 reweight=reweight, 
+                                 k=k, 
+                                 suppress_sens=suppress_sens, 
+                                 only_sens=only_sens)
     
     # LISTS TO STORE ACCURACY, FAIRNESS, TRADE-OFF AND EPOCH VALUES
     fairness_scores = []
@@ -462,39 +1042,37 @@ class EvaluateModel():
     tradeoff_score = []
     epoch_train = []
     
-    for train_index, test_index in kf.split(data.features, data.labels):        # Iterate over folds, fit the LR model (regular or reweighted as defined in args)
-      train_fold = data.subset(train_index)                                     # Define the train and test datasets based on the StratifiedKFold generated indices
-      test_fold = data.subset(test_index)                                       # Method .subset used to created datasets for each fold that retain AIF360 BinaryDataSet properties
-      model = EvaluateModel(self.sensitive_feature)
-
-      # SUPPRESS SENSITIVE GROUP IF suppress_sens IS TRUE
-      if suppress_sens == True:
-        train_fold, test_fold = self.FP.suppress_sens(train_fold, 
-                                                      test_fold,
-                                                      suppress_sens=suppress_sens, 
-                                                      only_sens=only_sens)
-        fit_data, test_pred = model.fit(train_fold, 
-                                        test_fold, 
-                                        lr, 
-                                        reg, 
-                                        epochs)
-      
-      # REWEIGH THE DATA IF reweigh IS TRUE      
-      elif reweight == True:
-        fit_data, test_pred = model.fit(train_fold, 
-                                        test_fold,
-                                        lr, 
-                                        reg, 
-                                        epochs,
-                                        reweight=reweight)
-      
-      else:
-        fit_data, test_pred = model.fit(train_fold, 
-                                        test_fold, 
-                                        lr, 
-                                        reg, 
-                                        epochs)
+    # WITH SGD FIT ALL FOLDS TOGETHER AS ONE BATCHED MODEL
+    if solver == 'sgd':
+      fold_data = [grid_data[0] for grid_data in self.fit_grid(folds, 
+                                                               [lr], 
+                                                               [reg], 
+                                                               epochs,
+                                                               verbose=verbose,
+                                                               patience=patience,
+                                                               seed=seed)]
+
+    # OTHERWISE FIT THE FOLDS IN PARALLEL THREADS, TORCH RELEASES THE GIL SO THE 
+    # FOLDS SHARE THE TENSORS WITHOUT PICKLING
+    else:
+      fold_results = Parallel(n_jobs=n_jobs, prefer='threads')(
+          delayed(self.fit_from_tensors)(test_fold, 
+                                         x_train, 
+                                         x_test, 
+                                         y_train, 
+                                         y_test,
+                                         lr, 
+                                         reg, 
+                                         epochs,
+                                         weights=weights,
+                                         solver=solver,
+                                         verbose=verbose,
+                                         patience=patience,
+                                         seed=seed)
+          for test_fold, x_train, x_test, y_train, y_test, weights in folds)
+      fold_data = [fit_data for fit_data, predicted_labels in fold_results]
         
+    for fit_data in fold_data:
       accuracy_scores.append(fit_data['accuracy'])                              
       fairness_scores.append(fit_data['fair'])
       epoch_train.append(fit_data['epoch'])
@@ -509,11 +1087,79 @@ class EvaluateModel():
     return mean_metrics                                                     
 
 
+  def evaluate_grid (self, folds, grid, epochs, solver='sgd', n_jobs=-1, 
+                     verbose=False, patience=1, seed=16):
+    """
+    Cross-validation of a list of hyperparameter combinations on pre-processed 
+    folds. With SGD all combinations and folds are trained together as one 
+    batched model (see fit_grid), otherwise the combinations are evaluated in 
+    parallel with joblib (see _fit_one). Folds stored on a GPU are not pickled 
+    to worker processes, on CUDA the combinations run in threads instead
+
+    Parameters:
+      folds: pre-processed folds generated by prepare_folds
+      grid: list of (learning rate, regularisation strength) tuples
+      epochs: number of training epochs
+      solver: optimiser used to fit each model, see test_hyperparam
+      n_jobs: number of joblib workers used when the solver is not 'sgd', 
+              loky worker processes on CPU and threads on CUDA
+      verbose: if True, show a progress bar of the training epochs
+      patience: number of stopping checks without improvement, see fit
+      seed: seed of the weight initialisation, see fit
+
+    Returns: 
+      results: list of dictionaries of mean accuracy, fairness, trade-off and 
+               epoch values for each combination, see cross_validation
+    """
+
+    # TRAIN EVERY COMBINATION ON EVERY FOLD TOGETHER AS ONE BATCHED SGD MODEL
+    if solver == 'sgd':
+      grid_lrs = [lr for lr, reg in grid]
+      grid_regs = [reg for lr, reg in grid]
+      fold_data = self.fit_grid(folds, grid_lrs, grid_regs, epochs, 
+                                verbose=verbose, patience=patience, seed=seed)
+
+      # MEAN METRICS OF EACH COMBINATION ACROSS THE FOLDS
+      results = []
+      for cell_data in zip(*fold_data):
+        mean_metrics = {}
+        mean_metrics['accuracy'] = np.mean([d['accuracy'] for d in cell_data])
+        mean_metrics['fair'] = np.mean([d['fair'] for d in cell_data])
+        mean_metrics['epoch'] = np.mean([d['epoch'] for d in cell_data])
+        mean_metrics['tradeoff'] = np.mean([d['tradeoff'] for d in cell_data])
+        results.append(mean_metrics)
+
+    # OTHERWISE EVALUATE EVERY COMBINATION IN PARALLEL, IN WORKER PROCESSES ON 
+    # CPU AND IN THREADS SHARING THE FOLDS ON CUDA SO THE GPU TENSORS ARE NOT 
+    # PICKLED (THREADS MUST NOT CHANGE THE PROCESS-WIDE TORCH THREAD COUNT)
+    else:
+      backend = 'threading' if self.device.type == 'cuda' else 'loky'
+      results = Parallel(n_jobs=n_jobs, backend=backend)(
+          delayed(_fit_one)(self.sensitive_feature, folds, lr, reg, epochs, 
+                            solver=solver, 
+                            single_thread=(n_jobs != 1 and backend == 'loky'), 
+                            verbose=verbose,
+                            patience=patience,
+                            seed=seed)
+          for lr, reg in grid)
+
+    return results
+
+
   def test_hyperparam (self, data_train, learning_rates, reg_strength, epochs, 
-                        reweight=False, suppress_sens=False, only_sens=True):
+                        reweight=False, suppress_sens=False, only_sens=True,
+                        solver='sgd', n_jobs=-1, verbose=False, 
+                        strategy='grid', n_iter=15, seed=16, patience=1):
     """
     Cross-validation of hyperparameter testing for each combination of learning 
-    rate and regularisation strength.  
+    rate and regularisation strength. The k-folds are pre-processed once and 
+    shared by every combination. With SGD all combinations and folds are 
+    trained together as one batched model (see fit_grid), otherwise the 
+    combinations are evaluated in parallel with joblib. With the 'random' 
+    strategy only n_iter combinations sampled log-uniformly between the 
+    smallest and largest values of each list are evaluated instead of the full 
+    grid, the 'multiresolution' strategy refines a coarse grid around its best 
+    combination
 
     Parameters:
       data_train: training subset of original dataset as array
@@ -526,6 +1172,26 @@ class EvaluateModel():
                      False, do not remove sensitive features from the dataset
       only_sens: if True, only remove the first sensitive feature from the 
                  dataset. If False, remove both sensitive features
+      solver: optimiser used to fit each model, 'sgd' (default) reproduces the 
+              learning rate study, 'lbfgs' converges much faster but ignores 
+              the learning rate
+      n_jobs: number of joblib workers evaluating the combinations in 
+              parallel when the solver is not 'sgd' (see evaluate_grid), loky 
+              worker processes on CPU and threads on CUDA. Default -1 uses 
+              all cores, 1 evaluates the combinations sequentially. Ignored by 
+              the 'sgd' solver, which trains every combination as one batched 
+              model
+      verbose: if True, show a progress bar of the training epochs
+      strategy: 'grid' (default) evaluates every combination of learning_rates 
+                and reg_strength, 'random' evaluates n_iter random combinations, 
+                'multiresolution' evaluates a coarse 3x3 grid over the same 
+                ranges then a fine 5x5 grid in a one decade window around the 
+                combination with the best trade-off, any other value raises a 
+                ValueError
+      n_iter: number of combinations sampled by the 'random' strategy
+      seed: random seed of the 'random' strategy and of the weight 
+            initialisation (see fit)
+      patience: number of stopping checks without improvement, see fit
 
     Returns: 
       hyperparam_data: dictionary of mean accuracy, fairness, trade-off and epoch 
@@ -535,54 +1201,168 @@ class EvaluateModel():
 
     hyperparam_data = {'epoch':[], 'lr':[], 'reg':[], 
                        'acc':[], 'fair':[], 'tradeoff':[]}
+
+    # PRE-PROCESS THE K-FOLDS ONCE FOR ALL HYPERPARAMETER COMBINATIONS
+    folds = self.prepare_folds(data_train, 
+                               reweight=reweight, 
+                               suppress_sens=suppress_sens, 
+                               only_sens=only_sens)
+
+    # FULL GRID, RANDOM SEARCH OR COARSE-TO-FINE SEARCH OVER THE SAME LOG RANGES
+    log_lrs = np.log10([min(learning_rates), max(learning_rates)])
+    log_regs = np.log10([min(reg_strength), max(reg_strength)])
+    if strategy == 'random':
+      rng = np.random.default_rng(seed)
+      grid = list(zip((10 ** rng.uniform(*log_lrs, n_iter)).tolist(), 
+                      (10 ** rng.uniform(*log_regs, n_iter)).tolist()))
+      results = self.evaluate_grid(folds, grid, epochs, solver=solver, 
+                                   n_jobs=n_jobs, verbose=verbose, 
+                                   patience=patience, seed=seed)
+    elif strategy == 'multiresolution':
+      # (1) COARSE 3x3 GRID OVER THE FULL RANGES
+      grid = list(product(np.logspace(*log_lrs, 3).tolist(), 
+                          np.logspace(*log_regs, 3).tolist()))
+      results = self.evaluate_grid(folds, grid, epochs, solver=solver, 
+                                   n_jobs=n_jobs, verbose=verbose, 
+                                   patience=patience, seed=seed)
+
+      # (2) FINE 5x5 GRID IN A ONE DECADE WINDOW AROUND THE BEST TRADE-OFF
+      best_lr, best_reg = grid[np.argmax([r['tradeoff'] for r in results])]
+      fine_lrs = np.logspace(max(log_lrs[0], np.log10(best_lr) - 1), 
+                             min(log_lrs[1], np.log10(best_lr) + 1), 5)
+      fine_regs = np.logspace(max(log_regs[0], np.log10(best_reg) - 1), 
+                              min(log_regs[1], np.log10(best_reg) + 1), 5)
+      fine_grid = [(lr, reg) for lr, reg in product(fine_lrs.tolist(), 
+                                                    fine_regs.tolist())
+                   if not np.isclose(grid, (lr, reg), rtol=1e-6, 
+                                     atol=0).all(1).any()]
+      results += self.evaluate_grid(folds, fine_grid, epochs, solver=solver, 
+                                    n_jobs=n_jobs, verbose=verbose, 
+                                    patience=patience, seed=seed)
+      grid += fine_grid
+    elif strategy == 'grid':
+      grid = list(product(learning_rates, reg_strength))
+      results = self.evaluate_grid(folds, grid, epochs, solver=solver, 
+                                   n_jobs=n_jobs, verbose=verbose, 
+                                   patience=patience, seed=seed)
+    else:
+      raise ValueError(f"strategy must be 'grid', 'random' or "
+                       f"'multiresolution', got {strategy!r}")
     
-    for lr in learning_rates:
-      for reg in reg_strength:
-        model = EvaluateModel(self.sensitive_feature)
-        mean_metrics = model.cross_validation(data_train,
-                                              lr,
-                                              reg, 
-                                              epochs,
-                                              reweight=reweight,
-                                              suppress_sens=suppress_sens,
-                                              only_sens=only_sens)
-        
-        hyperparam_data['epoch'].append(mean_metrics['epoch'])
-        hyperparam_data['lr'].append(lr)
-        hyperparam_data['reg'].append(reg)
-        hyperparam_data['acc'].append(mean_metrics['accuracy'])
-        hyperparam_data['fair'].append(mean_metrics['fair'])
-        hyperparam_data['tradeoff'].append(mean_metrics['tradeoff'])
+    for (lr, reg), mean_metrics in zip(grid, results):
+      hyperparam_data['epoch'].append(mean_metrics['epoch'])
+      hyperparam_data['lr'].append(lr)
+      hyperparam_data['reg'].append(reg)
+      hyperparam_data['acc'].append(mean_metrics['accuracy'])
+      hyperparam_data['fair'].append(mean_metrics['fair'])
+      hyperparam_data['tradeoff'].append(mean_metrics['tradeoff'])
     
     return hyperparam_data
 
+
+def _fit_one (sensitive_feature, folds, lr, reg, epochs, solver='lbfgs', 
+              single_thread=True, verbose=False, patience=1, seed=16):
+  """
+  Cross-validation of a single hyperparameter combination on pre-processed 
+  folds, used by EvaluateModel.evaluate_grid as the joblib task. Module level 
+  function without any shared state so that with the loky backend (CPU) only 
+  the folds and hyperparameters are pickled to the worker processes, not the 
+  EvaluateModel instance and its caches. With the threading backend (CUDA) 
+  the folds are shared with the calling thread
+
+  Parameters:
+    sensitive_feature: sensitive feature used to calculate fairness metrics 
+    folds: pre-processed folds generated by EvaluateModel.prepare_folds
+    lr: learning rate 
+    reg: L2 regularisation strength 
+    epochs: number of training epochs
+    solver: optimiser used to fit each fold, see EvaluateModel.fit
+    single_thread: if True, limit torch to one thread to avoid oversubscribing 
+                   the CPU cores when several workers run at once
+    verbose: if True, show a progress bar of the training epochs
+    patience: number of stopping checks without improvement, see 
+              EvaluateModel.fit
+    seed: seed of the weight initialisation, see EvaluateModel.fit
+
+  Returns:
+    mean_metrics: dictionary of mean accuracy, fairness, trade-off and epoch 
+                  values, see EvaluateModel.cross_validation
+  """
+
+  if single_thread:
+    torch.set_num_threads(1)
+  evaluator = EvaluateModel(sensitive_feature)
+  return evaluator.cross_validation(None, 
+                                    lr, 
+                                    reg, 
+                                    epochs, 
+                                    solver=solver, 
+                                    folds=folds, 
+                                    verbose=verbose, 
+                                    patience=patience,
+                                    n_jobs=1,
+                                    seed=seed)
+
 """### <font color='#00B2EE'>**CLASS:**</font> PlotGraphs"""
 
 class PlotGraphs():
   
-  def __init__ (self, sensitive_feature):
+  def __init__ (self, sensitive_feature, save_dir=None):
     """
     Constructor for PlotGraphs class
 
     Parameters: 
       sensitive_feature: sensitive feature used to define fairness metrics 
+      save_dir: directory to save the figures to as PNG files instead of 
+                showing them, if None (default) the figures are shown
     """
     self.sensitive_feature = sensitive_feature
     self.FP = FairnessProcessing(self.sensitive_feature)
+    self.save_dir = save_dir
+    self._n_saved = 0
   
 
-  def plot_heatmap(self, hp, dataset_name):
+  def show_figure (self, fig, name):
+    """
+    Show the figure, or save it to save_dir if set, then close it so finished 
+    figures do not accumulate in memory over the whole notebook. Saved file 
+    names start with the sensitive feature and a running count of the figures 
+    saved by this instance, so figures with the same name do not overwrite 
+    each other
+
+    Parameters:
+      fig: matplotlib figure to show or save
+      name: figure name as string, used for the file name when saving
+    """
+
+    if self.save_dir is None:
+      plt.show()
+    else:
+      os.makedirs(self.save_dir, exist_ok=True)
+      self._n_saved += 1
+      filename = (f'{self.sensitive_feature}_{self._n_saved:02d}_' 
+                  + re.sub(r'[^A-Za-z0-9]+', '_', name).strip('_') + '.png')
+      fig.savefig(os.path.join(self.save_dir, filename), bbox_inches='tight')
+    plt.close(fig)
+
+
+  def plot_heatmap(self, hp, dataset_name, axes=None):
     """
     Plots two seaborn heatmaps with X axis as learning rate and y axis as 
     regularisation strength
     (1) Model accuracy: ColourMap = green is more accurate and red less accurate 
     (2) Model fairness: ColourMap = white is most fair, darker blue indicates 
                         more bias either negative or positive
+    Results of a random search (see EvaluateModel.test_hyperparam) do not fill 
+    a grid and are plotted as log-scale scatter plots with the same colour maps
 
     Parameters:
       hp: dictionary of hyperparameter testing values generated by 
           EvaluateModel.test_hyperparam
       dataset_name: dataset name as string for graph title
+      axes: pair of matplotlib axes to draw the accuracy and fairness plots on, 
+            e.g. two cells of a larger subplot grid. If None (default) a new 
+            figure is created and shown
     
     Returns: 
       plot: seaborn heatmap of model accuracy based on hyperparameters
@@ -592,35 +1372,55 @@ class PlotGraphs():
     hm_data = pd.DataFrame(data={'x':hp['lr'], 'y':hp['reg'], 
                                  'acc':hp['acc'],                               
                                  'fairness':hp['fair']})                        
-    hm_data_acc = hm_data.pivot(index='y', columns='x', values='acc')
-    hm_data_fair = hm_data.pivot(index='y', columns='x', values='fairness')
 
     cmap_acc = cmap = sns.diverging_palette(10, 150, s=95, l=65, as_cmap=True)  
     cmap_fair = sns.diverging_palette(240, 240, s=95, l=65, center='light', 
                                       as_cmap=True)
 
-    plt.figure(figsize=(20,8))
     sns.set(font_scale=1.2)
-    # (1) MODEL ACCURACY HEATMAP
-    plt.subplot(121)                                                           
-    ax1 = sns.heatmap(hm_data_acc, annot=True, cmap=cmap_acc)
+    show = axes is None
+    if show:
+      fig = plt.figure(figsize=(20,8))
+      axes = (plt.subplot(121), plt.subplot(122))
+    ax1, ax2 = axes
+
+    # RANDOM SEARCH RESULTS, SCATTER PLOTS ON LOG AXES
+    if len(hm_data) != hm_data['x'].nunique() * hm_data['y'].nunique():
+      fair_lim = np.abs(hm_data['fairness']).max()
+      # (1) MODEL ACCURACY SCATTER PLOT
+      points = ax1.scatter(hm_data['x'], hm_data['y'], c=hm_data['acc'], 
+                           s=200, cmap=cmap_acc)
+      plt.colorbar(points, ax=ax1)
+      ax1.set(xscale='log', yscale='log')
+      # (2) MODEL FAIRNESS SCATTER PLOT, COLOUR MAP CENTRED ON 0
+      points = ax2.scatter(hm_data['x'], hm_data['y'], c=hm_data['fairness'], 
+                           s=200, cmap=cmap_fair, vmin=-fair_lim, vmax=fair_lim)
+      plt.colorbar(points, ax=ax2)
+      ax2.set(xscale='log', yscale='log')
+
+    else:
+      hm_data_acc = hm_data.pivot(index='y', columns='x', values='acc')
+      hm_data_fair = hm_data.pivot(index='y', columns='x', values='fairness')
+      # (1) MODEL ACCURACY HEATMAP
+      sns.heatmap(hm_data_acc, annot=True, cmap=cmap_acc, ax=ax1)
+      # (2) MODEL FAIRNESS HEATMAP
+      sns.heatmap(hm_data_fair, center=0, annot=True, cmap=cmap_fair, ax=ax2)
+
     ax1.set_title(f'\nAccuracy\n{dataset_name}')
     ax1.set_xlabel('Learning Rate')
     ax1.set_ylabel('Regularisation')
-    # (2) MODEL FAIRNESS HEATMAP
-    plt.subplot(122)                                                            
-    ax2 = sns.heatmap(hm_data_fair, center=0, annot=True, cmap=cmap_fair)
     ax2.set_title(f'\nFairness\n{dataset_name}')
     ax2.set_xlabel('Learning Rate')
     ax2.set_ylabel('Regularisation')
-    plt.show()
+    if show:
+      self.show_figure(fig, f'Heatmap {dataset_name}')
 
 
   def plot_cfmatrix (self, fit_data, test_predictions, data_test, 
                      favourable_label, unfavourable_label, 
                      title, dataset_name):
     """
-    Plot seaborn heatmap from SKLearn confusion matrix. Print model training 
+    Plot seaborn heatmap of the binary confusion matrix. Print model training 
     epochs, accuracy and fairness
 
     Parameters:
@@ -645,7 +1445,10 @@ class PlotGraphs():
     groundtruth = data_test.labels
     classes = (unfavourable_label, favourable_label)
 
-    cfmatrix = confusion_matrix(groundtruth, predictions)
+    # BINARY CONFUSION MATRIX WITH ONE BINCOUNT OF 2 * LABEL + PREDICTION, 
+    # ORDER = TN, FP, FN, TP
+    cell = 2 * groundtruth.ravel().astype(np.uint8) + predictions.ravel().astype(np.uint8)
+    cfmatrix = np.bincount(cell, minlength=4).reshape(2, 2)
     cm_data = pd.DataFrame(cfmatrix/np.sum(cfmatrix), 
                            index = [i for i in classes],
                            columns = [i for i in classes])
@@ -655,17 +1458,17 @@ class PlotGraphs():
     percent = ["{0:.2%}".format(value) for value in cfmatrix.flatten()/np.sum(cfmatrix)]
     labels = [f"{v1}\n{v2}\n{v3}" for v1, v2, v3 in zip(names, counts, percent)]
     labels = np.asarray(labels).reshape(2,2)
-    plt.figure(figsize = (12,7))
+    fig = plt.figure(figsize = (12,7))
     plt.title(f'\nConfusion Matrix for {title} Model\n{dataset_name}\n')
     sns.set(font_scale=1.4)
     sns.heatmap(cm_data, annot=labels, fmt='', cmap='binary')
-    plt.show()
+    self.show_figure(fig, f'Confusion Matrix {title} {dataset_name}')
     print('\n\033[1mEpochs:\033[0m', fit_data['epoch'])
     print('\033[1mAccuracy:\033[0m', "{0:.2%}".format(fit_data['accuracy']))
     print('\033[1mFairness:\033[0m',"{0:.4}".format(fit_data['fair']))
 
 
-  def tradeoff_heatmap(self, model_data, fair_data, dataset_name):
+  def tradeoff_heatmap(self, model_data, fair_data, dataset_name, axes=None):
     """
     Plots two seaborn heatmaps with X axis as learning rate and y axis as 
     regularisation strength with trade-off metric as the values
@@ -673,6 +1476,9 @@ class PlotGraphs():
                         accurate 
     (2) Fair Model: ColourMap = turquoise is more accurate and yellow less 
                     accurate 
+    Results of a random or multi-resolution search (see 
+    EvaluateModel.test_hyperparam) do not fill a shared grid and are plotted as 
+    log-scale scatter plots with the same colour map
 
     Parameters:
       model_data: dictionary of hyperparameter testing values generated by 
@@ -680,6 +1486,8 @@ class PlotGraphs():
       fair_data: dictionary of hyperparameter testing values generated by 
                   EvaluateModel.test_hyperparam for fair model
       dataset_name: name of dataset as string
+      axes: pair of matplotlib axes to draw the two heatmaps on, if None 
+            (default) a new figure is created and shown
 
     Returns:
       plot: seaborn heatmap of standard model trade-off metric based on 
@@ -687,32 +1495,49 @@ class PlotGraphs():
       plot: seaborn heatmap of fair model trade-off metric based on 
             hyperparameters
     """
-    hm_data = pd.DataFrame(data={'x':model_data['lr'], 
-                             'y':model_data['reg'], 
-                             'acc':model_data['acc'], 
-                             'fairness':model_data['fair'],
-                             'new_met_reg': model_data['tradeoff'],
-                             'new_met_fair': fair_data['tradeoff']})  
-
-    hm_data_regular = hm_data.pivot(index='y', columns='x', values='new_met_reg')
-    hm_data_fair = hm_data.pivot(index='y', columns='x', values='new_met_fair')
-    cmap = cmap = sns.diverging_palette(45, 195, s=95, l=65, as_cmap=True)
-
-    plt.figure(figsize=(20,8))
+    cmap = sns.diverging_palette(45, 195, s=95, l=65, as_cmap=True)
+
     sns.set(font_scale=1.2)
-    # STANDARD MODEL TRADE-OFF METRIC
-    plt.subplot(121)                                                            
-    ax1 = sns.heatmap(hm_data_regular, annot=True, cmap=cmap)
+    show = axes is None
+    if show:
+      fig = plt.figure(figsize=(20,8))
+      axes = (plt.subplot(121), plt.subplot(122))
+    ax1, ax2 = axes
+
+    # RANDOM OR MULTI-RESOLUTION SEARCH RESULTS, THE TWO SEARCHES MAY NOT 
+    # SAMPLE THE SAME POINTS SO EACH IS A SCATTER PLOT ON LOG AXES
+    is_grid = (model_data['lr'] == fair_data['lr'] 
+               and model_data['reg'] == fair_data['reg']
+               and len(model_data['lr']) == (len(set(model_data['lr'])) * 
+                                             len(set(model_data['reg']))))
+    if not is_grid:
+      for ax, hp in ((ax1, model_data), (ax2, fair_data)):
+        points = ax.scatter(hp['lr'], hp['reg'], c=hp['tradeoff'], 
+                            s=200, cmap=cmap)
+        plt.colorbar(points, ax=ax)
+        ax.set(xscale='log', yscale='log')
+
+    # THE TRADE-OFF VALUES ARE ALREADY AGGREGATED BY test_hyperparam, BOTH 
+    # HEATMAPS COME FROM ONE PIVOT
+    else:
+      hm_data = pd.DataFrame(data={'x':model_data['lr'], 
+                                   'y':model_data['reg'], 
+                                   'new_met_reg': model_data['tradeoff'],
+                                   'new_met_fair': fair_data['tradeoff']})  
+      hm_pivot = hm_data.pivot(index='y', columns='x')
+      # STANDARD MODEL TRADE-OFF METRIC
+      sns.heatmap(hm_pivot['new_met_reg'], annot=True, cmap=cmap, ax=ax1)
+      # FAIR MODEL TRADE-OFF METRIC
+      sns.heatmap(hm_pivot['new_met_fair'], annot=True, cmap=cmap, ax=ax2)
+
     ax1.set_title(f'\nTrade-off Metric (Regular Model)\n{dataset_name}')
     ax1.set_xlabel('Learning Rate')
     ax1.set_ylabel('Regularisation')
-    # FAIR MODEL TRADE-OFF METRIC
-    plt.subplot(122)                                                            
-    ax2 = sns.heatmap(hm_data_fair, annot=True, cmap=cmap)
     ax2.set_title(f'\nTrade-off Metric (Fair Model)\n{dataset_name}')
     ax2.set_xlabel('Learning Rate')
     ax2.set_ylabel('Regularisation')
-    plt.show()
+    if show:
+      self.show_figure(fig, f'Trade-off Heatmap {dataset_name}')
 
 """## <font color='#6959CD'>**PART 2:** Initial Exploratory Data Analysis of Bias in Datasets</font>"""
 
@@ -741,13 +1566,99 @@ FP_ga.dataset_analysis(german_data_age)
 ### <font color='#008000'>TASK 1: ADULT</font>
 """
 
+# ma EVALUATES SEX ON THE ADULT DATASET (EVERY ADULT GRID SEARCH AND MODEL), 
+# mg FITS THE GERMAN MODELS ON AGE. THE GERMAN GRID SEARCHES (AGE, AND SEX WITH 
+# SUPPRESSED FEATURES) DO NOT USE EITHER, THEY RUN ON THEIR OWN EVALUATORS IN A 
+# WORKER PROCESS (see german_sweep)
+
+ma = EvaluateModel('sex')
+mg = EvaluateModel('age')
+
+
+def german_sweep (sensitive_feature, data_train, n_threads, **kwargs):
+  """
+  German grid search run in the worker process next to the Adult workflow. The 
+  worker builds its own EvaluateModel (and caches) and is limited to n_threads 
+  torch threads, so the two processes share the cores instead of 
+  oversubscribing them
+
+  Parameters:
+    sensitive_feature: sensitive feature used to calculate fairness metrics 
+    data_train: training subset of original dataset as array
+    n_threads: number of torch intra-op threads of the worker process
+    **kwargs: arguments passed on to EvaluateModel.test_hyperparam
+
+  Returns:
+    hyperparam_data: see EvaluateModel.test_hyperparam
+  """
+
+  torch.set_num_threads(n_threads)
+  evaluator = EvaluateModel(sensitive_feature)
+  return evaluator.test_hyperparam(data_train, **kwargs)
+
+
+@contextmanager
+def stop_on_error (pool):
+  """
+  Kill the worker process of pool if the enclosed code raises or is 
+  interrupted, so the German grid searches do not keep training once the 
+  notebook stops
+
+  Parameters:
+    pool: ProcessPoolExecutor running the German grid searches
+  """
+
+  try:
+    yield
+  except BaseException:
+    pool.shutdown(wait=False, kill_workers=True)
+    raise
+
+
+# THE GERMAN GRID SEARCHES (PART 4 AND 5) RUN IN A LOKY WORKER PROCESS WHILE THE 
+# ADULT DATASET IS EVALUATED IN THE MAIN PROCESS, EACH PROCESS WITH HALF OF THE 
+# TORCH THREADS. THE RESULTS ARE COLLECTED WHERE EACH GRID SEARCH IS PLOTTED. 
+# EVERY GRID SEARCH SEEDS ITS OWN GENERATOR SO THE RESULTS ARE THE SAME AS 
+# RUNNING THEM ONE AFTER THE OTHER
+
+n_threads = torch.get_num_threads()
+german_threads = max(1, n_threads // 2)
+torch.set_num_threads(max(1, n_threads - german_threads))
+
+german_pool = ProcessPoolExecutor(max_workers=1)
+mg1_future = german_pool.submit(german_sweep, 'age', german_trn_a, 
+                                german_threads,
+                                learning_rates=learning_rates,
+                                reg_strength=reg_strength, 
+                                epochs=epochs)
+mg2_future = german_pool.submit(german_sweep, 'age', german_trn_a, 
+                                german_threads,
+                                learning_rates=learning_rates,
+                                reg_strength=reg_strength,
+                                epochs=epochs,
+                                reweight=True)
+mg_sens1_future = german_pool.submit(german_sweep, 'sex', german_trn_s, 
+                                     german_threads,
+                                     learning_rates=learning_rates,
+                                     reg_strength=reg_strength,
+                                     epochs=epochs,
+                                     suppress_sens=True,
+                                     only_sens=True)
+mg_sens2_future = german_pool.submit(german_sweep, 'sex', german_trn_s, 
+                                     german_threads,
+                                     learning_rates=learning_rates,
+                                     reg_strength=reg_strength,
+                                     epochs=epochs,
+                                     suppress_sens=True,
+                                     only_sens=False)
+
 # EVALUATE HYPERPARAMETERS FOR ADULT DATASET FOR STANDARD MODEL USING TRAINING DATA
 
-ma1 = EvaluateModel('sex')
-ma1_data = ma1.test_hyperparam(adult_trn_s,
-                               learning_rates,                                  
-                               reg_strength,                                    
-                               epochs=epochs)
+with stop_on_error(german_pool):
+  ma1_data = ma.test_hyperparam(adult_trn_s,
+                                learning_rates,                                  
+                                reg_strength,                                    
+                                epochs=epochs)
 
 # INSTANTIATE PlotGraphs CLASS FOR ADULT DATASET - SEX
 # PLOT HYPERPARAMETER HEATMAPS FOR ADULT DATASET
@@ -759,13 +1670,11 @@ PGA.plot_heatmap(ma1_data,
 # MODEL (1) 
 # TEST MOST ACCURATE MODEL FOR ADULT DATASET (SEX) ON TEST DATA
 
-model1 = EvaluateModel('sex')
-
-model1_data, test_pred1 = model1.fit(adult_trn_s, 
-                                    adult_tst_s,
-                                    lr=1e-1, 
-                                    reg=1e-1, 
-                                    epochs=epochs)
+model1_data, test_pred1 = ma.fit(adult_trn_s, 
+                                adult_tst_s,
+                                lr=1e-1, 
+                                reg=1e-1, 
+                                epochs=epochs)
 
 PGA.plot_cfmatrix(model1_data, 
                   test_pred1, 
@@ -778,13 +1687,11 @@ PGA.plot_cfmatrix(model1_data,
 # MODEL (2) 
 # TEST MOST FAIR MODEL FOR ADULT DATASET (SEX) ON TEST DATA
 
-model2 = EvaluateModel('sex')
-
-model2_data, test_pred2 = model2.fit(adult_trn_s, 
-                                     adult_tst_s,
-                                     lr=1e-5, 
-                                     reg=1e-1, 
-                                     epochs=epochs)
+model2_data, test_pred2 = ma.fit(adult_trn_s, 
+                                 adult_tst_s,
+                                 lr=1e-5, 
+                                 reg=1e-1, 
+                                 epochs=epochs)
 
 PGA.plot_cfmatrix(model2_data, 
                   test_pred2, 
@@ -798,12 +1705,12 @@ PGA.plot_cfmatrix(model2_data,
 
 # EVALUATE HYPERPARAMETERS FOR REWEIGHTED ADULT DATASET USING TRAINING DATA
 
-ma2_rwt = EvaluateModel('sex')
-ma2_data = ma2_rwt.test_hyperparam(adult_trn_s,
-                                   learning_rates,
-                                   reg_strength,
-                                   epochs=epochs,
-                                   reweight=True)
+with stop_on_error(german_pool):
+  ma2_data = ma.test_hyperparam(adult_trn_s,
+                                learning_rates,
+                                reg_strength,
+                                epochs=epochs,
+                                reweight=True)
 
 PGA.plot_heatmap(ma2_data, 
                  'Adult Dataset Reweighed (Sex)')
@@ -811,14 +1718,12 @@ PGA.plot_heatmap(ma2_data,
 # MODEL (3) 
 # TEST MOST ACCURATE MODEL WITH PREPROCESSED REWEIGHED TRAINING DATA ON TEST DATA
 
-model3 = EvaluateModel('sex')
-
-model3_data, test_pred3 = model3.fit(adult_trn_s, 
-                                     adult_tst_s,
-                                     lr=1e-1, 
-                                     reg=1e-1, 
-                                     epochs=epochs,
-                                     reweight=True)
+model3_data, test_pred3 = ma.fit(adult_trn_s, 
+                                 adult_tst_s,
+                                 lr=1e-1, 
+                                 reg=1e-1, 
+                                 epochs=epochs,
+                                 reweight=True)
 
 PGA.plot_cfmatrix(model3_data, 
                   test_pred3, 
@@ -831,14 +1736,12 @@ PGA.plot_cfmatrix(model3_data,
 # MODEL (4) 
 # MOST FAIR MODEL WITH PREPROCESSED REWEIGHED TRAINING DATA ON TEST DATA
  
-model4 = EvaluateModel('sex')
-
-model4_data, test_pred4 = model4.fit(adult_trn_s, 
-                                     adult_tst_s,
-                                     lr=1e-1, 
-                                     reg=1e-2, 
-                                     epochs=epochs,
-                                     reweight=True)
+model4_data, test_pred4 = ma.fit(adult_trn_s, 
+                                 adult_tst_s,
+                                 lr=1e-1, 
+                                 reg=1e-2, 
+                                 epochs=epochs,
+                                 reweight=True)
 
 PGA.plot_cfmatrix(model4_data, 
                   test_pred4, 
@@ -857,13 +1760,11 @@ PGA.tradeoff_heatmap(ma1_data, ma2_data, 'Adult Dataset')
 # MODEL (5) 
 # TEST BEST TRADE-OFF METRIC FOR STANDARD MODEL FOR ADULT DATASET (SEX) ON TEST DATA
 
-model5 = EvaluateModel('sex')
-
-model5_data, test_pred5 = model5.fit(adult_trn_s, 
-                                     adult_tst_s,
-                                     lr=1e-3, 
-                                     reg=1e-6, 
-                                     epochs=epochs)
+model5_data, test_pred5 = ma.fit(adult_trn_s, 
+                                 adult_tst_s,
+                                 lr=1e-3, 
+                                 reg=1e-6, 
+                                 epochs=epochs)
 
 PGA.plot_cfmatrix(model5_data, 
                   test_pred5, 
@@ -876,14 +1777,12 @@ PGA.plot_cfmatrix(model5_data,
 # MODEL (6) 
 # TEST BEST TRADE-OFF METRIC FOR FAIR MODEL FOR ADULT DATASET (SEX) ON TEST DATA
 
-model6 = EvaluateModel('sex')
-
-model6_data, test_pred6 = model6.fit(adult_trn_s, 
-                                     adult_tst_s,
-                                     lr=1e-1, 
-                                     reg=1e-1, 
-                                     epochs=epochs,
-                                     reweight=True)
+model6_data, test_pred6 = ma.fit(adult_trn_s, 
+                                 adult_tst_s,
+                                 lr=1e-1, 
+                                 reg=1e-1, 
+                                 epochs=epochs,
+                                 reweight=True)
 
 PGA.plot_cfmatrix(model6_data, 
                   test_pred6, 
@@ -900,11 +1799,8 @@ PGA.plot_cfmatrix(model6_data,
 
 # EVALUATE HYPERPARAMETERS FOR GERMAN DATASET FOR STANDARD MODEL USING TRAINING DATA
 
-mg1 = EvaluateModel('age')
-mg1_data = mg1.test_hyperparam(german_trn_a,
-                               learning_rates,
-                               reg_strength, 
-                               epochs=epochs)
+with stop_on_error(german_pool):
+  mg1_data = mg1_future.result()
 
 # INSTANTIATE PlotGraphs CLASS FOR GERMAN DATASET - AGE
 # PLOT HYPERPARAMETER HEATMAPS FOR GERMAN DATASET
@@ -916,13 +1812,11 @@ PGG.plot_heatmap(mg1_data,
 # MODEL (1) 
 # TEST MOST ACCURATE MODEL FOR GERMAN DATASET (AGE) ON TEST DATA
 
-model_g1 = EvaluateModel('age')
-
-model_g1_data, test_pred_g1 = model_g1.fit(german_trn_a, 
-                                           german_tst_a,
-                                           lr=1e-1, 
-                                           reg=1e-1,
-                                           epochs=epochs)
+model_g1_data, test_pred_g1 = mg.fit(german_trn_a, 
+                                     german_tst_a,
+                                     lr=1e-1, 
+                                     reg=1e-1,
+                                     epochs=epochs)
 
 PGG.plot_cfmatrix(model_g1_data, 
                   test_pred_g1, 
@@ -935,13 +1829,11 @@ PGG.plot_cfmatrix(model_g1_data,
 # MODEL (2) 
 # TEST MOST FAIR MODEL FOR GERMAN DATASET (AGE) ON TEST DATA
 
-model_g2 = EvaluateModel('age')
-
-model_g2_data, test_pred_g2 = model_g2.fit(german_trn_a, 
-                                           german_tst_a,
-                                           lr=1e-5, 
-                                           reg=1e-6,
-                                           epochs=epochs)
+model_g2_data, test_pred_g2 = mg.fit(german_trn_a, 
+                                     german_tst_a,
+                                     lr=1e-5, 
+                                     reg=1e-6,
+                                     epochs=epochs)
 
 PGG.plot_cfmatrix(model_g2_data, 
                   test_pred_g2, 
@@ -955,26 +1847,20 @@ PGG.plot_cfmatrix(model_g2_data,
 
 # EVALUATE HYPERPARAMETERS FOR REWEIGHTED GERMAN DATASET USING TRAINING DATA
 
-mg2_rwt = EvaluateModel('age')
-mg2_data = mg2_rwt.test_hyperparam(german_trn_a,
-                                   learning_rates,
-                                   reg_strength,
-                                   epochs=epochs,
-                                   reweight=True)
+with stop_on_error(german_pool):
+  mg2_data = mg2_future.result()
 
 PGG.plot_heatmap(mg2_data, 'German Dataset Reweighed (Sensitive Feature = Age)')
 
 # MODEL (3) 
 # TEST MOST ACCURATE MODEL WITH PREPROCESSED REWEIGHED TRAINING DATA ON TEST DATA
 
-model_g3 = EvaluateModel('age')
-
-model_g3_data, test_pred_g3 = model_g3.fit(german_trn_a, 
-                                           german_tst_a,
-                                           lr=1e-1, 
-                                           reg=1e-2,
-                                           epochs=epochs,
-                                           reweight=True)
+model_g3_data, test_pred_g3 = mg.fit(german_trn_a, 
+                                     german_tst_a,
+                                     lr=1e-1, 
+                                     reg=1e-2,
+                                     epochs=epochs,
+                                     reweight=True)
 
 PGG.plot_cfmatrix(model_g3_data, 
                   test_pred_g3, 
@@ -987,14 +1873,12 @@ PGG.plot_cfmatrix(model_g3_data,
 # MODEL (4) 
 # MOST FAIR MODEL WITH PREPROCESSED REWEIGHED TRAINING DATA ON TEST DATA
 
-model_g4 = EvaluateModel('age')
-
-model_g4_data, test_pred_g4 = model_g4.fit(german_trn_a, 
-                                           german_tst_a,
-                                           lr=1e-1, 
-                                           reg=1e-2,
-                                           epochs=epochs,
-                                           reweight=True)
+model_g4_data, test_pred_g4 = mg.fit(german_trn_a, 
+                                     german_tst_a,
+                                     lr=1e-1, 
+                                     reg=1e-2,
+                                     epochs=epochs,
+                                     reweight=True)
 
 PGG.plot_cfmatrix(model_g4_data, test_pred_g4, german_tst_a, 
                   '1: Good Credit', '0: Bad Credit',
@@ -1010,13 +1894,11 @@ PGG.tradeoff_heatmap(mg1_data, mg2_data, 'German Dataset')
 # MODEL (5) 
 # TEST BEST TRADE-OFF METRIC FOR STANDARD MODEL FOR GERMAN DATASET (AGE) ON TEST DATA
 
-model_g5 = EvaluateModel('age')
-
-model_g5_data, test_pred_g5 = model_g5.fit(german_trn_a, 
-                                           german_tst_a,
-                                           lr=1e-3, 
-                                           reg=1e-3, 
-                                           epochs=epochs)
+model_g5_data, test_pred_g5 = mg.fit(german_trn_a, 
+                                     german_tst_a,
+                                     lr=1e-3, 
+                                     reg=1e-3, 
+                                     epochs=epochs)
 
 PGG.plot_cfmatrix(model_g5_data, 
                   test_pred_g5, 
@@ -1029,14 +1911,12 @@ PGG.plot_cfmatrix(model_g5_data,
 # MODEL (6) 
 # TEST BEST TRADE-OFF METRIC FOR FAIR MODEL FOR GERMAN DATASET (SEX) ON TEST DATA
 
-model_g6 = EvaluateModel('age')
-
-model_g6_data, test_pred_g6 = model_g6.fit(german_trn_a, 
-                                           german_tst_a,
-                                           lr=1e-1, 
-                                           reg=1e-2, 
-                                           epochs=epochs,
-                                           reweight=True)
+model_g6_data, test_pred_g6 = mg.fit(german_trn_a, 
+                                     german_tst_a,
+                                     lr=1e-1, 
+                                     reg=1e-2, 
+                                     epochs=epochs,
+                                     reweight=True)
 
 PGG.plot_cfmatrix(model_g6_data, 
                   test_pred_g6, 
@@ -1046,39 +1926,73 @@ PGG.plot_cfmatrix(model_g6_data,
                   'Trade-off Metric',
                   'German Dataset Reweighed (Suppressed Sensitive Feature = Age)')
 
-"""## <font color='#CD4F39'>**PART 5:** Suppressed Sensitive Feature(s) - Adult and German Datasets</font>
-
-### <font color='#B22222'>Adult Dataset</font>
-
-#### ONE SENSITIVE FEATURE SUPPRESSED
-"""
+"""## <font color='#CD4F39'>**PART 5:** Suppressed Sensitive Feature(s) - Adult and German Datasets</font>"""
 
 # EVALUATE HYPERPARAMETERS FOR ADULT DATASET FOR STANDARD MODEL TRAINED WITH ONE 
 # SENSITIVE FEATURE REMOVED FROM DATASET
 
-ma_sens1 = EvaluateModel('sex')
-ma_sens1_data = ma_sens1.test_hyperparam(adult_trn_s,
-                                       learning_rates,
-                                       reg_strength,
-                                       epochs=epochs,
-                                       suppress_sens=True,
-                                       only_sens=True)
+with stop_on_error(german_pool):
+  ma_sens1_data = ma.test_hyperparam(adult_trn_s,
+                                   learning_rates,
+                                   reg_strength,
+                                   epochs=epochs,
+                                   suppress_sens=True,
+                                   only_sens=True)
 
-# PLOT HYPERPARAMETER HEATMAPS FOR ADULT DATASET
+  # EVALUATE HYPERPARAMETERS FOR ADULT DATASET FOR STANDARD MODEL TRAINED WITH BOTH 
+  # SENSITIVE FEATURES REMOVED FROM DATASET
 
-PGA.plot_heatmap(ma_sens1_data, 'Adult Dataset (Suppressed Sensitive Feature = Race)')
+  ma_sens2_data = ma.test_hyperparam(adult_trn_s,
+                                   learning_rates,
+                                   reg_strength,
+                                   epochs=epochs,
+                                   suppress_sens=True,
+                                   only_sens=False)
+
+  # HYPERPARAMETERS FOR GERMAN DATASET WITH ONE AND BOTH SENSITIVE FEATURES 
+  # REMOVED (EVALUATED IN THE WORKER PROCESS SINCE PART 3)
+
+  mg_sens1_data = mg_sens1_future.result()
+  mg_sens2_data = mg_sens2_future.result()
+
+# ALL GERMAN GRID SEARCHES ARE DONE, STOP THE WORKER AND GIVE THE MAIN PROCESS 
+# EVERY TORCH THREAD BACK
+german_pool.shutdown()
+torch.set_num_threads(n_threads)
+
+# PLOT ALL SUPPRESSED SENSITIVE FEATURE HEATMAPS IN ONE FIGURE, ADULT DATASET ON 
+# THE TOP ROW AND GERMAN DATASET ON THE BOTTOM ROW
+
+fig, axes = plt.subplots(2, 4, figsize=(40, 16))
+PGA.plot_heatmap(ma_sens1_data, 
+                 'Adult Dataset (Suppressed Sensitive Feature = Race)', 
+                 axes=axes[0, :2])
+PGA.plot_heatmap(ma_sens2_data, 
+                 'Adult Dataset (Suppressed Sensitive Feature = Race and Sex)', 
+                 axes=axes[0, 2:])
+PGG.plot_heatmap(mg_sens1_data, 
+                 'German Dataset (Suppressed Sensitive Feature = Age)', 
+                 axes=axes[1, :2])
+PGG.plot_heatmap(mg_sens2_data, 
+                 'German Dataset (Suppressed Sensitive Feature = Age and Sex)', 
+                 axes=axes[1, 2:])
+plt.tight_layout()
+PGA.show_figure(fig, 'Heatmaps Suppressed Sensitive Features')
+
+"""### <font color='#B22222'>Adult Dataset</font>
+
+#### ONE SENSITIVE FEATURE SUPPRESSED
+"""
 
 # MODEL (s1) 
 # MOST ACCURATE MODEL FOR ADULT DATASET (SEX) WITH SENSITIVE FEATURE RACE REMOVED
-model_s1 = EvaluateModel('sex')
-
-model_s1_data, test_pred_s1 = model_s1.fit(adult_trn_s,
-                                           adult_tst_s,
-                                           lr=1e-1,
-                                           reg=1e-1, 
-                                           epochs=epochs,
-                                           suppress_sens=True,
-                                           only_sens=True)
+model_s1_data, test_pred_s1 = ma.fit(adult_trn_s,
+                                     adult_tst_s,
+                                     lr=1e-1,
+                                     reg=1e-1, 
+                                     epochs=epochs,
+                                     suppress_sens=True,
+                                     only_sens=True)
 
 PGA.plot_cfmatrix(model_s1_data, 
                   test_pred_s1, 
@@ -1091,15 +2005,13 @@ PGA.plot_cfmatrix(model_s1_data,
 # MODEL (s2) 
 # MOST FAIR MODEL FOR ADULT DATASET (SEX) WITH SENSITIVE FEATURE RACE REMOVED
 
-model_s2 = EvaluateModel('sex')
-
-model_s2_data, test_pred_s2 = model_s2.fit(adult_trn_s,
-                                           adult_tst_s,
-                                           lr=1e-7, 
-                                           reg=1e-2, 
-                                           epochs=epochs,
-                                           suppress_sens=True,
-                                           only_sens=True)
+model_s2_data, test_pred_s2 = ma.fit(adult_trn_s,
+                                     adult_tst_s,
+                                     lr=1e-7, 
+                                     reg=1e-2, 
+                                     epochs=epochs,
+                                     suppress_sens=True,
+                                     only_sens=True)
 
 PGA.plot_cfmatrix(model_s2_data, 
                   test_pred_s2, 
@@ -1111,33 +2023,16 @@ PGA.plot_cfmatrix(model_s2_data,
 
 """#### BOTH SENSITIVE FEATURES SUPPRESSED"""
 
-# EVALUATE HYPERPARAMETERS FOR ADULT DATASET FOR STANDARD MODEL TRAINED WITH BOTH 
-# SENSITIVE FEATURES REMOVED FROM DATASET
-
-ma_sens2 = EvaluateModel('sex')
-ma_sens2_data = ma_sens2.test_hyperparam(adult_trn_s,
-                                       learning_rates,
-                                       reg_strength,
-                                       epochs=epochs,
-                                       suppress_sens=True,
-                                       only_sens=False)
-
-# PLOT HYPERPARAMETER HEATMAPS FOR ADULT DATASET
-
-PGA.plot_heatmap(ma_sens2_data, 'Adult Dataset (Suppressed Sensitive Feature = Race and Sex)')
-
 # MODEL (s3) 
 # MOST ACCURATE MODEL FOR ADULT DATASET (SEX) WITH SENSITIVE FEATURES RACE AND SEX REMOVED
 
-model7 = EvaluateModel('sex')
-
-model7_data, test_pred7 = model7.fit(adult_trn_s, 
-                                     adult_tst_s,
-                                     lr=1e-1, 
-                                     reg=1e-1, 
-                                     epochs=epochs,
-                                     suppress_sens=True,
-                                     only_sens=False)
+model7_data, test_pred7 = ma.fit(adult_trn_s, 
+                                 adult_tst_s,
+                                 lr=1e-1, 
+                                 reg=1e-1, 
+                                 epochs=epochs,
+                                 suppress_sens=True,
+                                 only_sens=False)
 
 PGA.plot_cfmatrix(model7_data, test_pred7, adult_tst_s,
                   '1: >50k', '0: <50K', 
@@ -1146,15 +2041,13 @@ PGA.plot_cfmatrix(model7_data, test_pred7, adult_tst_s,
 # MODEL (s4) 
 # MOST FAIR MODEL FOR ADULT DATASET (SEX) WITH SENSITIVE FEATURES RACE AND SEX REMOVED
 
-model8 = EvaluateModel('sex')
-
-model8_data, test_pred8 = model8.fit(adult_trn_s, 
-                                     adult_tst_s,
-                                     lr=1e-3, 
-                                     reg=1e-4, 
-                                     epochs=epochs,
-                                     suppress_sens=True,
-                                     only_sens=False)
+model8_data, test_pred8 = ma.fit(adult_trn_s, 
+                                 adult_tst_s,
+                                 lr=1e-3, 
+                                 reg=1e-4, 
+                                 epochs=epochs,
+                                 suppress_sens=True,
+                                 only_sens=False)
 
 PGA.plot_cfmatrix(model8_data, test_pred8, adult_tst_s,
                   '1: >50k', '0: <50K', 
@@ -1165,33 +2058,16 @@ PGA.plot_cfmatrix(model8_data, test_pred8, adult_tst_s,
 #### ONE SENSITIVE FEATURE SUPPRESSED
 """
 
-# EVALUATE HYPERPARAMETERS FOR GERMAN DATASET FOR STANDARD MODEL TRAINED WITH ONE 
-# SENSITIVE FEATURE REMOVED FROM DATASET
-
-mg_sens1 = EvaluateModel('sex')
-mg_sens1_data = mg_sens1.test_hyperparam(german_trn_s,
-                                         learning_rates,
-                                         reg_strength,
-                                         epochs=epochs,
-                                         suppress_sens=True,
-                                         only_sens=True)
-
-# PLOT HYPERPARAMETER HEATMAPS FOR GERMAN DATASET
-
-PGG.plot_heatmap(mg_sens1_data, 'German Dataset (Suppressed Sensitive Feature = Age)')
-
 # MODEL (s1) 
 # MOST ACCURATE MODEL FOR GERMAN DATASET (AGE) WITH SENSITIVE FEATURE AGE REMOVED
 
-model_sg1 = EvaluateModel('age')
-
-model_sg1_data, test_pred_sg1 = model_sg1.fit(german_trn_a, 
-                                              german_tst_a,
-                                              lr=1e-1, 
-                                              reg=1e-1,
-                                              epochs=epochs,
-                                              suppress_sens=True,
-                                              only_sens=True)
+model_sg1_data, test_pred_sg1 = mg.fit(german_trn_a, 
+                                       german_tst_a,
+                                       lr=1e-1, 
+                                       reg=1e-1,
+                                       epochs=epochs,
+                                       suppress_sens=True,
+                                       only_sens=True)
 
 PGG.plot_cfmatrix(model_sg1_data, 
                   test_pred_sg1, 
@@ -1204,15 +2080,13 @@ PGG.plot_cfmatrix(model_sg1_data,
 # MODEL (s2) 
 # MOST FAIR MODEL FOR GERMAN DATASET (AGE) WITH SENSITIVE FEATURES AGE AND SEX REMOVED
 
-model_sg2 = EvaluateModel('age')
-
-model_sg2_data, test_pred_sg2 = model_sg2.fit(german_trn_a, 
-                                              german_tst_a,
-                                              lr=1e-7, 
-                                              reg=1e-1,
-                                              epochs=epochs,
-                                              suppress_sens=True,
-                                              only_sens=True)
+model_sg2_data, test_pred_sg2 = mg.fit(german_trn_a, 
+                                       german_tst_a,
+                                       lr=1e-7, 
+                                       reg=1e-1,
+                                       epochs=epochs,
+                                       suppress_sens=True,
+                                       only_sens=True)
 
 PGG.plot_cfmatrix(model_sg2_data, 
                   test_pred_sg2, 
@@ -1224,33 +2098,16 @@ PGG.plot_cfmatrix(model_sg2_data,
 
 """#### BOTH SENSITIVE FEATURES SUPPRESSED"""
 
-# EVALUATE HYPERPARAMETERS FOR GERMAN DATASET FOR STANDARD MODEL TRAINED WITH BOTH 
-# SENSITIVE FEATURES REMOVED FROM DATASET
-
-mg_sens2 = EvaluateModel('sex')
-mg_sens2_data = mg_sens2.test_hyperparam(german_trn_s,
-                                         learning_rates,
-                                         reg_strength,
-                                         epochs=epochs,
-                                         suppress_sens=True,
-                                         only_sens=False)
-
-# PLOT HYPERPARAMETER HEATMAPS FOR GERMAN DATASET
-
-PGG.plot_heatmap(mg_sens2_data, 'German Dataset (Suppressed Sensitive Feature = Age and Sex)')
-
 # MODEL (s3) 
 # MOST ACCURATE MODEL FOR GERMAN DATASET (AGE) WITH SENSITIVE FEATURES AGE AND SEX REMOVED
 
-model_sg3 = EvaluateModel('age')
-
-model_sg3_data, test_pred_sg3 = model_sg3.fit(german_trn_a, 
-                                              german_tst_a,
-                                              lr=1e-1, 
-                                              reg=1e-1,
-                                              epochs=epochs,
-                                              suppress_sens=True,
-                                              only_sens=False)
+model_sg3_data, test_pred_sg3 = mg.fit(german_trn_a, 
+                                       german_tst_a,
+                                       lr=1e-1, 
+                                       reg=1e-1,
+                                       epochs=epochs,
+                                       suppress_sens=True,
+                                       only_sens=False)
 
 PGG.plot_cfmatrix(model_sg3_data, 
                   test_pred_sg3, 
@@ -1263,15 +2120,13 @@ PGG.plot_cfmatrix(model_sg3_data,
 # MODEL (s4) 
 # MOST FAIR MODEL FOR GERMAN DATASET (AGE) WITH SENSITIVE FEATURES AGE AND SEX REMOVED
 
-model_sg4 = EvaluateModel('age')
-
-model_sg4_data, test_pred_sg4 = model_sg4.fit(german_trn_a, 
-                                              german_tst_a,
-                                              lr=1e-5, 
-                                              reg=1e-3,
-                                              epochs=epochs,
-                                              suppress_sens=True,
-                                              only_sens=False)
+model_sg4_data, test_pred_sg4 = mg.fit(german_trn_a, 
+                                       german_tst_a,
+                                       lr=1e-5, 
+                                       reg=1e-3,
+                                       epochs=epochs,
+                                       suppress_sens=True,
+                                       only_sens=False)
 
 PGG.plot_cfmatrix(model_sg4_data, 
                   test_pred_sg4, 